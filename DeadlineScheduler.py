@@ -0,0 +1,119 @@
+# ---------------------------
+# 截止时间提醒：即将到来的时间点保存在最小堆中，只为最近的一个设置定时器
+# ---------------------------
+
+
+import datetime
+import heapq
+import itertools
+import math
+from PyQt5 import QtCore
+from TaskTableModel import row_key
+
+NOTICE = 0   # 截止前提醒
+EXPIRY = 1   # 周期任务到期，需要移到下一次
+# QTimer 在系统休眠期间不计时，限制单次等待时间，唤醒后最多延迟这么久
+MAX_WAIT_MS = 10 * 60 * 1000
+
+
+class DeadlineScheduler(QtCore.QObject):
+    """
+    Tells the window when tasks need attention, without scanning them.
+
+    deadlineApproaching(task) is emitted once per task and due time when
+    the task comes within `lead` of its (displayed) due time, and
+    tasksExpired(tasks) when the DUE of recurring tasks has passed.
+
+    Upcoming events are kept in a min-heap and a single single-shot timer
+    is armed for the earliest one. setTasks() compares each task's due
+    times with the ones already scheduled and pushes events only for new
+    or changed tasks; events of changed or removed tasks stay in the heap
+    and are dropped when they reach the top.
+    """
+    deadlineApproaching = QtCore.pyqtSignal(object)
+    tasksExpired = QtCore.pyqtSignal(list)
+
+    def __init__(self, displayDue, lead=datetime.timedelta(minutes=10), parent=None):
+        super(DeadlineScheduler, self).__init__(parent)
+        self.displayDue = displayDue
+        self.lead = lead
+        self.heap = []           # (时间, 序号, 类型, key, 截止时间)
+        self.scheduled = {}      # key -> (显示截止时间, 周期任务的 DUE 或 None)
+        self.tasks = {}          # key -> task
+        self.notified = set()    # 已提醒过的 (key, 截止时间)
+        self._seq = itertools.count()
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._onTimeout)
+
+    def setTasks(self, tasks):
+        now = datetime.datetime.now()
+        seen = {}
+        current = {}
+        scheduled = {}
+        for task in tasks:
+            key = row_key(task, seen)
+            current[key] = task
+            if task.status == 'COMPLETED' or not task.due:
+                continue
+            entry = (self.displayDue(task), task.due if task.rrule else None)
+            scheduled[key] = entry
+            if self.scheduled.get(key) == entry:
+                continue
+            due, expiry = entry
+            if due > now and (key, due) not in self.notified:
+                self._push(due - self.lead, NOTICE, key, due)
+            if expiry is not None:
+                self._push(expiry, EXPIRY, key, expiry)
+        self.tasks = current
+        self.scheduled = scheduled
+        self.notified = {pair for pair in self.notified if pair[0] in scheduled}
+        # 过期条目太多时重建堆，避免频繁修改后堆无限增长
+        if len(self.heap) > 4 * len(scheduled) + 64:
+            self.heap = [event for event in self.heap if self._isCurrent(event)]
+            heapq.heapify(self.heap)
+        self._arm()
+
+    def _push(self, when, kind, key, due):
+        heapq.heappush(self.heap, (when, next(self._seq), kind, key, due))
+
+    def _isCurrent(self, event):
+        _, _, kind, key, due = event
+        entry = self.scheduled.get(key)
+        return entry is not None and entry[kind] == due
+
+    def _arm(self):
+        heap = self.heap
+        while heap and not self._isCurrent(heap[0]):
+            heapq.heappop(heap)
+        if not heap:
+            self.timer.stop()
+            return
+        wait = (heap[0][0] - datetime.datetime.now()).total_seconds() * 1000
+        self.timer.start(int(min(max(math.ceil(wait), 0), MAX_WAIT_MS)))
+
+    def _onTimeout(self):
+        now = datetime.datetime.now()
+        approaching = []
+        expired = []
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            event = heapq.heappop(heap)
+            if not self._isCurrent(event):
+                continue
+            _, _, kind, key, due = event
+            task = self.tasks[key]
+            # 表格中勾选完成时任务对象被直接修改
+            if task.status == 'COMPLETED':
+                continue
+            if kind == EXPIRY:
+                expired.append(task)
+            elif now < due and (key, due) not in self.notified:
+                self.notified.add((key, due))
+                approaching.append(task)
+        self._arm()
+        # 最后再发信号：槽中可能弹出对话框并在其事件循环里再次调用 setTasks()
+        for task in approaching:
+            self.deadlineApproaching.emit(task)
+        if expired:
+            self.tasksExpired.emit(expired)
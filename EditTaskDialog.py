@@ -47,14 +47,7 @@ class EditTaskDialog(QtWidgets.QDialog):
         self.deadlineEdit.setCalendarPopup(True)
         self.deadlineEdit.setDisplayFormat("yyyy-MM-dd HH:mm")
         if task.due:
-            import datetime
-            due_datetime = task.due
-            if isinstance(due_datetime, str):
-                try:
-                    due_datetime = datetime.datetime.strptime(due_datetime, "%Y-%m-%dT%H:%M:%S")
-                except Exception:
-                    due_datetime = datetime.datetime.now()
-            self.deadlineEdit.setDateTime(QtCore.QDateTime(due_datetime))
+            self.deadlineEdit.setDateTime(QtCore.QDateTime(task.due))
             initial_no_due = False
         else:
             initial_no_due = True
@@ -68,10 +61,8 @@ class EditTaskDialog(QtWidgets.QDialog):
         self.recurringCheck = QtWidgets.QCheckBox(self.translations.get("recurring_task", "周期任务"))
         
         # 解析现有 RRULE
-        rrule_val = getattr(task, 'rrule', None)
-        if rrule_val is None and isinstance(task, dict):
-            rrule_val = task.get('rrule')
-            
+        rrule_val = task.rrule
+
         is_recurring = bool(rrule_val)
         freq, interval = parse_rrule(rrule_val) if rrule_val else (None, 1)
         
@@ -1,38 +1,19 @@
 from translations import TRANSLATIONS
-from nextcloudtasks import NextcloudTask, Todo, parse_rrule_to_minutes, minutes_to_rrule
-from local_tasks import load_local_tasks, save_local_tasks
+from nextcloudtasks import NextcloudTask, next_occurrence
 from TaskHandler import TaskHandler
+from TaskTableModel import TaskTableModel, TaskProxyModel, PRIORITY_BANDS
 from SettingsDialog import SettingsDialog
 from EditTaskDialog import EditTaskDialog
 from AddTaskDialog import AddTaskDialog
 from AboutDialog import AboutDialog
+from TaskWorker import TaskRunner
+from DeadlineScheduler import DeadlineScheduler
 import datetime
 import json
 import sys
 import urllib3
 from PyQt5 import QtCore, QtGui, QtWidgets
 
-# 自定义排序的 QTableWidgetItem
-
-
-class SortedItem(QtWidgets.QTableWidgetItem):
-    def __init__(self, text, sort_key=None):
-        super().__init__(text)
-        # 如果未指定，则用文本作为排序关键字
-        self.sort_key = sort_key if sort_key is not None else text
-
-    def __lt__(self, other):
-        if isinstance(other, SortedItem):
-            # 若内部数据为数字，则进行数字比较
-            if isinstance(self.sort_key, (int, float)) and isinstance(other.sort_key, (int, float)):
-                return self.sort_key < other.sort_key
-            # 若为日期则直接比较
-            if isinstance(self.sort_key, datetime.datetime) and isinstance(other.sort_key, datetime.datetime):
-                return self.sort_key < other.sort_key
-        # 否则按照字符串比较
-        return str(self.sort_key) < str(other.sort_key)
-
-
 # ---------------------------
 # 主窗口
 # ---------------------------
@@ -77,6 +58,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.path_icon = self.config["icon_path"]
         self.setWindowTitle(self.translations["window_title"])
         self.resize(535, 400)
+        # 所有网络操作都在后台线程中按顺序执行
+        self.runner = TaskRunner(self)
+        self.runner.busyChanged.connect(self.onBusyChanged)
+        # 勾选框的状态修改先在界面上生效，停止点击一段时间后合并成一次提交
+        self.pendingStatus = {}
+        self.statusTimer = QtCore.QTimer(self)
+        self.statusTimer.setSingleShot(True)
+        self.statusTimer.setInterval(int(self.config.get("status_debounce_ms", 800)))
+        self.statusTimer.timeout.connect(self.flushStatusChanges)
         self.initUI()
         self.createMenuBar()  # 含语言切换和设置
         self.createTrayIcon()
@@ -87,47 +77,90 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.nc_client = NextcloudTask(config=self.config)
         if not self.config['offline_mode']:
-            try:
-                self.nc_client.connect(
-                    self.config["username"], self.config["password"])
-            except Exception as e:
-                QtWidgets.QMessageBox.critical(
-                    self,
-                    self.translations["connection_error"],
-                    self.translations["connection_failed"].format(e)
-                )
+            # 登录时不下载任务列表，启动后由 reconcileWithServer() 统一获取一次
+            self.runner.run(self.nc_client.connect,
+                            self.config["username"], self.config["password"], False,
+                            on_error=self.onConnectFailed)
         self.task_handler = TaskHandler(
             self.config, self.path_tasks, self.nc_client)
-        self.tasks = self.task_handler.fetch_tasks()
+        # 先显示本地缓存的任务，不等待网络
+        self.tasks = self.task_handler.store.load()
+        self.refreshTaskTable()
+
+    def reconcileWithServer(self):
+        """Bring the cached tasks up to date once, in the background, after startup."""
+        if not self.config['offline_mode']:
+            # 发送发件箱并做一次增量同步，结果按行差异更新表格；比较对话框只在手动同步时出现
+            self.fetchTasks()
+
+    def onConnectFailed(self, e):
+        QtWidgets.QMessageBox.critical(
+            self,
+            self.translations["connection_error"],
+            self.translations["connection_failed"].format(e)
+        )
+
+    def onBusyChanged(self, busy):
+        if busy:
+            self.statusBar().showMessage(self.translations["busy"])
+            self.busyBar.show()
+        else:
+            self.statusBar().clearMessage()
+            self.busyBar.hide()
 
     def initUI(self):
         centralWidget = QtWidgets.QWidget()
         self.setCentralWidget(centralWidget)
         layout = QtWidgets.QVBoxLayout(centralWidget)
 
-        self.tableWidget = QtWidgets.QTableWidget()
-        self.tableWidget.setColumnCount(5)
-        self.tableWidget.setHorizontalHeaderLabels([
-            self.translations["completed"],
-            self.translations["task_name"].replace(":", ""),
-            self.translations["priority"].replace(":", ""),
-            self.translations["deadline"].replace(":", ""),
-            self.translations["task_detail"].replace(":", "")
-        ])
-        # 取消编辑，注意勾选框将在 itemChanged 中响应变化
-        self.tableWidget.setEditTriggers(
+        # 搜索框与筛选条件（只影响显示，不修改任务）
+        filterLayout = QtWidgets.QHBoxLayout()
+        self.searchEdit = QtWidgets.QLineEdit()
+        self.searchEdit.setClearButtonEnabled(True)
+        self.statusFilter = QtWidgets.QComboBox()
+        self.priorityFilter = QtWidgets.QComboBox()
+        self.overdueFilter = QtWidgets.QCheckBox()
+        self.fillFilterWidgets()
+        filterLayout.addWidget(self.searchEdit, 1)
+        filterLayout.addWidget(self.statusFilter)
+        filterLayout.addWidget(self.priorityFilter)
+        filterLayout.addWidget(self.overdueFilter)
+        layout.addLayout(filterLayout)
+
+        # 模型按 uid 增量更新行，代理模型负责排序
+        self.taskModel = TaskTableModel(self.translations, self.current_language,
+                                        self._get_display_due, self)
+        self.proxyModel = TaskProxyModel(self)
+        self.proxyModel.setSourceModel(self.taskModel)
+        self.taskView = QtWidgets.QTableView()
+        self.taskView.setModel(self.proxyModel)
+        # 取消编辑，注意勾选框的变化由模型的 statusToggled 信号通知
+        self.taskView.setEditTriggers(
             QtWidgets.QAbstractItemView.NoEditTriggers)
-        layout.addWidget(self.tableWidget)
+        self.taskView.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        # 固定行高，大列表滚动时无需逐行测量
+        self.taskView.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        layout.addWidget(self.taskView)
 
         # 记录各列的当前排序顺序（用于点击时切换排序顺序）
         self.last_sort_order = {}
 
         # 连接表头点击信号（只对第0、1、2、3列响应排序）
-        header = self.tableWidget.horizontalHeader()
+        header = self.taskView.horizontalHeader()
         header.sectionClicked.connect(self.onHeaderClicked)
 
-        # 监听 item 状态变化（用于完成列的勾选）
-        self.tableWidget.itemChanged.connect(self.onItemChanged)
+        # 监听完成列的勾选
+        self.taskModel.statusToggled.connect(self.onStatusToggled)
+
+        # 输入时等停顿后再筛选，一两个字母的宽泛查询不会每次按键都执行
+        self.searchTimer = QtCore.QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(150)
+        self.searchTimer.timeout.connect(self.applyFilter)
+        self.searchEdit.textChanged.connect(lambda text: self.searchTimer.start())
+        self.statusFilter.currentIndexChanged.connect(self.applyFilter)
+        self.priorityFilter.currentIndexChanged.connect(self.applyFilter)
+        self.overdueFilter.toggled.connect(self.applyFilter)
 
         btnLayout = QtWidgets.QHBoxLayout()
         self.fetchButton = QtWidgets.QPushButton(
@@ -145,6 +178,13 @@ class MainWindow(QtWidgets.QMainWindow):
         btnLayout.addWidget(self.syncButton)
         layout.addLayout(btnLayout)
 
+        # 状态栏中的忙碌指示（不确定进度条）
+        self.busyBar = QtWidgets.QProgressBar()
+        self.busyBar.setRange(0, 0)
+        self.busyBar.setMaximumWidth(120)
+        self.busyBar.hide()
+        self.statusBar().addPermanentWidget(self.busyBar)
+
         self.fetchButton.clicked.connect(self.fetchTasks)
         self.addButton.clicked.connect(self.openAddTaskDialog)
         self.editButton.clicked.connect(self.editTask)
@@ -161,142 +201,66 @@ class MainWindow(QtWidgets.QMainWindow):
             logicalIndex, QtCore.Qt.AscendingOrder)
         new_order = QtCore.Qt.DescendingOrder if current_order == QtCore.Qt.AscendingOrder else QtCore.Qt.AscendingOrder
         self.last_sort_order[logicalIndex] = new_order
-        self.tableWidget.sortItems(logicalIndex, new_order)
-
-    def onItemChanged(self, item):
-        # 仅对第0列（完成列）进行响应
-        if item.column() != 0:
-            return
-        # 注意：为防止因刷新表格再次触发 itemChanged 信号，此处可考虑先断开信号，更新后再连接
-        row = item.row()
-        # 从任务名称所在列（第1列）取出 uid 与 summary
-        uid_item = self.tableWidget.item(row, 1)
-        if uid_item is None:
+        if QtWidgets.QApplication.keyboardModifiers() & QtCore.Qt.ShiftModifier:
+            # 按住 Shift 点击：把该列加为次要排序列（已在排序列中则只改顺序）
+            columns = [(c, o) for c, o in self.proxyModel.sortColumns if c != logicalIndex]
+            self.proxyModel.setSortColumns(columns + [(logicalIndex, new_order)])
+        else:
+            self.proxyModel.sort(logicalIndex, new_order)
+
+    def fillFilterWidgets(self):
+        """(Re)fill the filter widgets' texts in the current language."""
+        self.searchEdit.setPlaceholderText(self.translations["search_placeholder"])
+        self.overdueFilter.setText(self.translations["filter_overdue"])
+        for combo, items in (
+                (self.statusFilter, [("filter_all_status", None),
+                                     ("filter_open", "open"),
+                                     ("filter_completed", "completed")]),
+                (self.priorityFilter, [("filter_all_priority", None)] +
+                 [(band, band) for band in PRIORITY_BANDS])):
+            current = combo.currentIndex()
+            combo.blockSignals(True)
+            combo.clear()
+            for text_key, value in items:
+                combo.addItem(self.translations[text_key], value)
+            combo.setCurrentIndex(max(current, 0))
+            combo.blockSignals(False)
+
+    def applyFilter(self, *args):
+        self.searchTimer.stop()
+        self.proxyModel.setFilter(self.searchEdit.text(),
+                                  self.statusFilter.currentData(),
+                                  self.priorityFilter.currentData(),
+                                  self.overdueFilter.isChecked())
+
+    def onStatusToggled(self, task):
+        # 模型已直接修改内存中的任务，界面无需重建
+        # 同一任务的多次点击只保留最后一次，计时器重新开始
+        self.pendingStatus[(task.uid, task.summary)] = (task.status, task.percent_complete)
+        self.statusTimer.start()
+        # 重新完成/取消完成的任务需要加入或移出提醒
+        self.deadlineScheduler.setTasks(self.tasks)
+
+    def flushStatusChanges(self):
+        """Send the collected checkbox changes as one batch."""
+        self.statusTimer.stop()
+        if not self.pendingStatus:
             return
-        uid = uid_item.data(QtCore.Qt.UserRole)
-        summary = uid_item.text()
-        is_checked = item.checkState() == QtCore.Qt.Checked
-        new_percent = 100 if is_checked else 0
-        new_status = "COMPLETED" if is_checked else "NEEDS-ACTION"
-        # 更新任务状态后重新刷新任务列表
-        self.task_handler.update_status(uid, summary, new_status, new_percent)
-        self.fetchTasks()
+        changes = [(uid, summary, status, percent)
+                   for (uid, summary), (status, percent) in self.pendingStatus.items()]
+        self.pendingStatus = {}
+        self.runner.run(self.task_handler.update_statuses, changes)
 
     def refreshTaskTable(self):
-        # 在刷新期间屏蔽信号，防止 itemChanged 导致重复调用
-        self.tableWidget.blockSignals(True)
-        self.tableWidget.setRowCount(0)
-        for task in self.tasks:
-            # 计算显示的截止时间（对于周期任务，计算下一个未到期的截止时间）
-            display_due = self._get_display_due(task)
-            
-            rowPosition = self.tableWidget.rowCount()
-            self.tableWidget.insertRow(rowPosition)
-
-            # 第0列：完成状态（使用可勾选项），同时保存排序关键字（1：完成，0：未完成）
-            item_completed = SortedItem(
-                "", sort_key=1 if task.status == "COMPLETED" else 0)
-            item_completed.setFlags(
-                QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsUserCheckable)
-            if task.status == "COMPLETED":
-                item_completed.setCheckState(QtCore.Qt.Checked)
-            else:
-                item_completed.setCheckState(QtCore.Qt.Unchecked)
-            self.tableWidget.setItem(rowPosition, 0, item_completed)
-
-            # 第1列：任务名称，同时存储 uid 方便查找任务
-            item_name = SortedItem(task.summary, sort_key=task.summary)
-            item_name.setData(QtCore.Qt.UserRole, task.uid)
-            self.tableWidget.setItem(rowPosition, 1, item_name)
-
-            # 第2列：优先级，先尝试转成数字用于排序
-            try:
-                p_val = int(task.priority)
-            except Exception:
-                p_val = None
-            if p_val is None:
-                display_priority = str(task.priority)
-                sort_priority = 100  # 默认较低优先级
-            else:
-                if p_val == 0:
-                    display_priority = self.translations.get(
-                        "priority_extremely_high", "极高")
-                elif 1 <= p_val <= 3:
-                    display_priority = self.translations.get(
-                        "priority_high", "高")
-                elif 4 <= p_val <= 6:
-                    display_priority = self.translations.get(
-                        "priority_medium", "中")
-                elif 7 <= p_val <= 9:
-                    display_priority = self.translations.get(
-                        "priority_low", "低")
-                else:
-                    display_priority = str(p_val)
-                sort_priority = p_val
-            item_priority = SortedItem(
-                display_priority, sort_key=sort_priority)
-            self.tableWidget.setItem(rowPosition, 2, item_priority)
-
-            # 第3列：截止日期，使用计算后的 display_due
-            if display_due:
-                # 确保是 datetime 对象
-                if isinstance(display_due, str):
-                    try:
-                        display_due = datetime.datetime.strptime(display_due, "%Y-%m-%dT%H:%M:%S")
-                    except Exception:
-                        display_due = None
-                
-                if display_due and isinstance(display_due, datetime.datetime):
-                    deadline_str = display_due.strftime('%Y-%m-%d %H:%M')
-                    sort_deadline = display_due
-                else:
-                    deadline_str = self.translations["no_due"]
-                    sort_deadline = datetime.datetime.max
-            else:
-                deadline_str = self.translations["no_due"]
-                sort_deadline = datetime.datetime.max
-            item_deadline = SortedItem(deadline_str, sort_key=sort_deadline)
-            self.tableWidget.setItem(rowPosition, 3, item_deadline)
-
-            # 第4列：任务详情（不启用排序，直接使用普通项）
-            detail_clean = task.description if task.description else ""
-            detail_str = detail_clean if detail_clean else ("无" if self.current_language == "zh" else "None")
-            item_detail = QtWidgets.QTableWidgetItem(detail_str)
-            self.tableWidget.setItem(rowPosition, 4, item_detail)
-        self.tableWidget.blockSignals(False)
+        # 只有变化的行会被插入、删除或重绘
+        self.taskModel.setTasks(self.tasks)
+        # 提醒也只为变化的任务重新安排
+        self.deadlineScheduler.setTasks(self.tasks)
 
     def _get_display_due(self, task):
         """计算任务的显示截止时间。对于周期任务，返回下一个未到期的截止时间。"""
-        rrule_val = getattr(task, 'rrule', None) or (task.get('rrule') if isinstance(task, dict) else None)
-
-        interval_minutes = 0
-        if rrule_val:
-            interval_minutes = parse_rrule_to_minutes(rrule_val) or 0
-        
-        if not rrule_val or not interval_minutes or not task.due:
-            return task.due
-        
-        now = datetime.datetime.now()
-        current_due = task.due
-        
-        # 确保 current_due 是 datetime 对象
-        if isinstance(current_due, str):
-            try:
-                current_due = datetime.datetime.strptime(current_due, "%Y-%m-%dT%H:%M:%S")
-            except Exception:
-                return task.due
-        
-        # 如果原始截止时间还没到，直接返回
-        if current_due > now:
-            return current_due
-        
-        # 计算下一个未到期的截止时间（使用分钟）
-        interval = datetime.timedelta(minutes=interval_minutes)
-        while current_due <= now:
-            current_due = current_due + interval
-        
-        return current_due
-
+        # 直接按规则计算下一次发生时间；规则结束或无法识别时显示原截止时间
+        return next_occurrence(task.rrule, task.due, datetime.datetime.now()) or task.due
 
     # 其余函数保持不变
     def createMenuBar(self):
@@ -344,13 +308,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def updateTranslations(self):
         self.setWindowTitle(self.translations["window_title"])
-        self.tableWidget.setHorizontalHeaderLabels([
-            self.translations["completed"],
-            self.translations["task_name"].replace(":", ""),
-            self.translations["priority"].replace(":", ""),
-            self.translations["deadline"].replace(":", ""),
-            self.translations["task_detail"].replace(":", "")
-        ])
+        self.taskModel.setTranslations(self.translations, self.current_language)
+        self.fillFilterWidgets()
         self.fetchButton.setText(self.translations["fetch_task"])
         self.addButton.setText(self.translations["add_task"])
         self.editButton.setText(self.translations["edit_task"])
@@ -377,7 +336,7 @@ class MainWindow(QtWidgets.QMainWindow):
         restoreAction = trayMenu.addAction(self.translations["restore"])
         restoreAction.triggered.connect(self.showNormal)
         quitAction = trayMenu.addAction(self.translations["quit"])
-        quitAction.triggered.connect(QtWidgets.QApplication.quit)
+        quitAction.triggered.connect(self.quitApp)
         self.trayIcon.setContextMenu(trayMenu)
         self.trayIcon.show()
 
@@ -385,33 +344,51 @@ class MainWindow(QtWidgets.QMainWindow):
         event.ignore()
         self.hide()
 
+    def quitApp(self):
+        # 退出前提交尚未发送的勾选修改
+        self.flushStatusChanges()
+        self.runner.waitForDone(10000)
+        QtWidgets.QApplication.quit()
+
     def fetchTasks(self):
-        self.tasks = self.task_handler.fetch_tasks()
+        # 先提交勾选修改，否则服务器数据会覆盖尚未保存的状态
+        self.flushStatusChanges()
+        self.runner.run(self.task_handler.fetch_tasks, on_done=self.onTasksFetched)
+
+    def onTasksFetched(self, tasks):
+        self.tasks = tasks
         self.refreshTaskTable()
 
+    def showInfoAndFetch(self, title, message):
+        QtWidgets.QMessageBox.information(self, title, message)
+        self.fetchTasks()
+
     def openAddTaskDialog(self):
         dialog = AddTaskDialog(self)
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             data = dialog.getData()
-            self.task_handler.add_task(data)
-            QtWidgets.QMessageBox.information(
-                self,
-                self.translations["add_task"],
-                self.translations.get("add_success", "任务添加成功")
-            )
-            self.fetchTasks()
+            self.runner.run(self.task_handler.add_task, data,
+                            on_done=lambda _: self.showInfoAndFetch(
+                                self.translations["add_task"],
+                                self.translations.get("add_success", "任务添加成功")))
+
+    def selectedTask(self):
+        """The task in the current row of the view, or None."""
+        indexes = self.taskView.selectionModel().selectedIndexes()
+        if not indexes:
+            return None
+        return self.taskModel.taskAt(self.proxyModel.mapToSource(indexes[0]).row())
 
     def editTask(self):
-        selectedItems = self.tableWidget.selectedItems()
-        if not selectedItems:
+        selected = self.selectedTask()
+        if selected is None:
             QtWidgets.QMessageBox.warning(
                 self,
                 self.translations["edit_task"],
                 self.translations["select_task_edit"]
             )
             return
-        row = selectedItems[0].row()
-        uid = self.tableWidget.item(row, 1).data(QtCore.Qt.UserRole)
+        uid = selected.uid
         if uid:
             task_obj = next((t for t in self.tasks if t.uid == uid), None)
             if not task_obj:
@@ -424,28 +401,22 @@ class MainWindow(QtWidgets.QMainWindow):
             dialog = EditTaskDialog(self, task_obj)
             if dialog.exec_() == QtWidgets.QDialog.Accepted:
                 data = dialog.getData()
-                self.task_handler.update_task(uid, data)
-                QtWidgets.QMessageBox.information(
-                    self,
-                    self.translations["edit_task"],
-                    self.translations.get("edit_success", "任务修改成功")
-                )
-                self.fetchTasks()
+                self.runner.run(self.task_handler.update_task, uid, data,
+                                on_done=lambda _: self.showInfoAndFetch(
+                                    self.translations["edit_task"],
+                                    self.translations.get("edit_success", "任务修改成功")))
         else:
-            task_name = self.tableWidget.item(row, 1).text()
+            task_name = selected.summary
             task_obj = next(
                 (t for t in self.tasks if t.summary == task_name), None)
             if task_obj:
                 dialog = EditTaskDialog(self, task_obj)
                 if dialog.exec_() == QtWidgets.QDialog.Accepted:
                     data = dialog.getData()
-                    self.task_handler.update_task(task_obj.uid, data)
-                    QtWidgets.QMessageBox.information(
-                        self,
-                        self.translations["edit_task"],
-                        self.translations.get("local_edit_success", "本地任务修改成功")
-                    )
-                    self.fetchTasks()
+                    self.runner.run(self.task_handler.update_task, task_obj.uid, data, task_name,
+                                    on_done=lambda _: self.showInfoAndFetch(
+                                        self.translations["edit_task"],
+                                        self.translations.get("local_edit_success", "本地任务修改成功")))
             else:
                 QtWidgets.QMessageBox.warning(
                     self,
@@ -454,26 +425,22 @@ class MainWindow(QtWidgets.QMainWindow):
                 )
 
     def deleteTask(self):
-        selectedItems = self.tableWidget.selectedItems()
-        if not selectedItems:
+        selected = self.selectedTask()
+        if selected is None:
             QtWidgets.QMessageBox.warning(
                 self,
                 self.translations["delete_task"],
                 self.translations["select_task_edit"]
             )
             return
-        row = selectedItems[0].row()
-        summary = self.tableWidget.item(row, 1).text()
-        uid = self.tableWidget.item(row, 1).data(QtCore.Qt.UserRole)
-        self.task_handler.delete_task(uid, summary)
-        QtWidgets.QMessageBox.information(
-            self,
-            self.translations["delete_task"],
-            self.translations.get("delete_success", "任务删除成功")
-        )
-        self.fetchTasks()
-
-    def checkLocalServerTasks(self):
+        summary = selected.summary
+        uid = selected.uid
+        self.runner.run(self.task_handler.delete_task, uid, summary,
+                        on_done=lambda _: self.showInfoAndFetch(
+                            self.translations["delete_task"],
+                            self.translations.get("delete_success", "任务删除成功")))
+
+    def checkLocalServerTasks(self, then_sync=False):
         if self.config['offline_mode']:
             QtWidgets.QMessageBox.information(
                 self,
@@ -482,6 +449,27 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             return
 
+        def on_error(e):
+            print(e)
+            QtWidgets.QMessageBox.critical(
+                self,
+                self.translations["fetch_error_title"],
+                self.translations["fetch_error_message"].format(e)
+            )
+            self.refreshTaskTable()
+            if then_sync:
+                self.syncServerTasks(check=False)
+
+        self.flushStatusChanges()
+        self.runner.run(self.task_handler.load_server_and_local_tasks,
+                        on_done=lambda result: self.onLocalServerTasksLoaded(result, then_sync),
+                        on_error=on_error)
+
+    def onLocalServerTasksLoaded(self, result, then_sync=False):
+        server_records, local_records = result
+        server_tasks = [task.to_dict() for task in server_records]
+        local_data = [task.to_dict() for task in local_records]
+
         def normalize_due_datetime(due):
             if isinstance(due, datetime.datetime):
                 return due
@@ -525,42 +513,34 @@ class MainWindow(QtWidgets.QMainWindow):
                     return False
             return True
 
-        try:
-            self.nc_client.updateTodos()
-            todos = self.nc_client.todos
-            self.tasks = [Todo(t.data) for t in todos]
-            server_tasks = [task.to_dict() for task in self.tasks]
-
-            local_data = load_local_tasks(self.path_tasks)
-            if not data_is_same(local_data, server_tasks):
-                msgBox = QtWidgets.QMessageBox(self)
-                msgBox.setWindowTitle(self.translations["json_mismatch_title"])
-                msgBox.setText(self.translations["json_mismatch_message"])
-                btnLocal = msgBox.addButton(
-                    self.translations["use_local"], QtWidgets.QMessageBox.AcceptRole)
-                btnServer = msgBox.addButton(
-                    self.translations["use_server"], QtWidgets.QMessageBox.RejectRole)
-                msgBox.exec_()
-                if msgBox.clickedButton() == btnLocal:
-                    final_tasks = local_data
-                    self.syncServerTasks(check=False)
-                elif msgBox.clickedButton() == btnServer:
-                    # 直接使用服务器数据，包括 rrule
-                    final_tasks = server_tasks
-                else:
-                    raise Exception("msgBox button error")
+        self.tasks = server_records
+        use_local = False
+        if not data_is_same(local_data, server_tasks):
+            msgBox = QtWidgets.QMessageBox(self)
+            msgBox.setWindowTitle(self.translations["json_mismatch_title"])
+            msgBox.setText(self.translations["json_mismatch_message"])
+            btnLocal = msgBox.addButton(
+                self.translations["use_local"], QtWidgets.QMessageBox.AcceptRole)
+            btnServer = msgBox.addButton(
+                self.translations["use_server"], QtWidgets.QMessageBox.RejectRole)
+            msgBox.exec_()
+            if msgBox.clickedButton() == btnLocal:
+                final_tasks = local_records
+                use_local = True
+            elif msgBox.clickedButton() == btnServer:
+                # 直接使用服务器数据，包括 rrule
+                final_tasks = server_records
             else:
-                # 直接使用服务器数据
-                final_tasks = server_tasks
-            save_local_tasks(final_tasks, self.path_tasks)
-        except Exception as e:
-            print(e)
-            QtWidgets.QMessageBox.critical(
-                self,
-                self.translations["fetch_error_title"],
-                self.translations["fetch_error_message"].format(e)
-            )
+                self.refreshTaskTable()
+                return
+        else:
+            # 直接使用服务器数据
+            final_tasks = server_records
+        self.runner.run(self.task_handler.store.save, final_tasks)
         self.refreshTaskTable()
+        if use_local or then_sync:
+            # 以本地数据为准时，把本地任务推送到服务器
+            self.syncServerTasks(check=False)
 
     def syncServerTasks(self, check=True):
         if self.config['offline_mode']:
@@ -572,90 +552,25 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         if check:
-            self.checkLocalServerTasks()
-        try:
-            self.nc_client.updateTodos()
-        except Exception as e:
+            # 先比较本地与服务器数据，比较完成后再推送
+            self.checkLocalServerTasks(then_sync=True)
+            return
+
+        def on_error(e):
             QtWidgets.QMessageBox.warning(
                 self,
                 self.translations["sync_task"],
                 self.translations["sync_warning"]
             )
-            return
 
-        local_tasks = load_local_tasks(self.path_tasks)
-        for task in local_tasks:
-            try:
-                if not task.get("uid"):
-                    self.nc_client.addTodo(task["summary"],
-                                           priority=task["priority"],
-                                           percent_complete=task.get('percent_complete', 0))
-                    self.nc_client.updateTodos()
-                    uid = self.nc_client.getUidbySummary(task["summary"])
-                    note = task.get('description', '')
-                    # ensure due is datetime when possible
-                    due_value = task.get('due')
-                    try:
-                        if isinstance(due_value, str):
-                            due_value = datetime.datetime.strptime(due_value, "%Y-%m-%dT%H:%M:%S")
-                    except Exception:
-                        pass
-                    
-                    rrule_val = task.get('rrule')
-                    if not rrule_val:
-                          rrule_val = ""
-
-                    self.nc_client.updateTodo(uid,
-                                              note=note,
-                                              due=due_value,
-                                              priority=task["priority"],
-                                              percent_complete=task.get('percent_complete', 0),
-                                              rrule=rrule_val)
-                    task["uid"] = uid
-                else:
-                    note = task.get('description', '')
-                    due_value = task.get('due')
-                    try:
-                        if isinstance(due_value, str):
-                            due_value = datetime.datetime.strptime(due_value, "%Y-%m-%dT%H:%M:%S")
-                    except Exception:
-                        pass
-                        
-                    # Push rrule if available locally
-                    rrule_val = task.get('rrule')
-                    if not rrule_val:
-                          rrule_val = ""
-
-                    self.nc_client.updateTodo(task["uid"],
-                                              summary=task["summary"],
-                                              note=note,
-                                              due=due_value,
-                                              priority=task["priority"],
-                                              percent_complete=task.get('percent_complete', 0),
-                                              rrule=rrule_val)
-            except Exception as ex:
-                print(
-                    f"{task['summary']} \n{self.translations['sync_error']}: {ex}")
-                task["sync_error"] = str(ex)
-
-        try:
-            self.nc_client.updateTodos()
-            todos = self.nc_client.todos
-            server_tasks = [Todo(t.data).to_dict() for t in todos]
-
-            # 解析服务器上的 description，检查其中的 Recurrence Info 元数据是否与本地一致；
-            # 若不一致，则将本地的周期信息打包回服务器（以本地为准）
-            try:
-                for st in server_tasks:
-                   pass
-            except Exception:
-                pass
-
-            # 直接使用服务器数据保存
-            save_local_tasks(server_tasks, self.path_tasks)
-        except Exception as ex:
-            print(f"{self.translations['sync_error']}: {ex}")
+        self.flushStatusChanges()
+        self.runner.run(self.task_handler.push_local_tasks,
+                        on_done=self.onServerTasksSynced, on_error=on_error)
 
+    def onServerTasksSynced(self, results):
+        for summary, uid, error in results:
+            if error is not None:
+                print(f"{summary} \n{self.translations['sync_error']}: {error}")
         QtWidgets.QMessageBox.information(
             self,
             self.translations["sync_task"],
@@ -664,32 +579,20 @@ class MainWindow(QtWidgets.QMainWindow):
         self.fetchTasks()
 
     def setupDeadlineChecker(self):
-        self.deadlineTimer = QtCore.QTimer(self)
-        self.deadlineTimer.timeout.connect(self.checkDeadlines)
-        self.deadlineTimer.start(self.config["check_interval"] * 1000)
-
-    def checkDeadlines(self):
-        now = datetime.datetime.now()
-        for task in self.tasks:
-            # 确保 task_due 是 datetime 对象
-            task_due = task.due
-            if isinstance(task_due, str):
-                try:
-                    task_due = datetime.datetime.strptime(task_due, "%Y-%m-%dT%H:%M:%S")
-                except Exception:
-                    continue
-            
-            if task_due and (now > (task_due - datetime.timedelta(minutes=10))) and (now < task_due):
-                title = self.translations["tray_deadline_title"]
-                msg_template = self.translations["tray_deadline_message"]
-                msg = msg_template.format(summary=task.summary)
-                self.trayIcon.showMessage(
-                    title, msg, QtWidgets.QSystemTrayIcon.Warning, 5000)
-                if self.config.get('show_ddl_message_box', False):
-                    QtWidgets.QMessageBox.warning(self, title, msg)
-        
-        # 检查周期任务是否到期，如果到期则更新到下一个周期并同步到服务器
-        self.checkRecurringTasksExpiry()
+        # 只在下一个截止时间到来时触发，不再定时扫描全部任务
+        self.deadlineScheduler = DeadlineScheduler(self._get_display_due, parent=self)
+        self.deadlineScheduler.deadlineApproaching.connect(self.notifyDeadline)
+        # 周期任务到期后更新到下一个周期并同步到服务器
+        self.deadlineScheduler.tasksExpired.connect(self.checkRecurringTasksExpiry)
+
+    def notifyDeadline(self, task):
+        title = self.translations["tray_deadline_title"]
+        msg_template = self.translations["tray_deadline_message"]
+        msg = msg_template.format(summary=task.summary)
+        self.trayIcon.showMessage(
+            title, msg, QtWidgets.QSystemTrayIcon.Warning, 5000)
+        if self.config.get('show_ddl_message_box', False):
+            QtWidgets.QMessageBox.warning(self, title, msg)
 
     def setupServerTasksChecker(self):
         self.serverTimer = QtCore.QTimer(self)
@@ -697,70 +600,46 @@ class MainWindow(QtWidgets.QMainWindow):
         self.serverTimer.start(self.config["check_interval"] * 1000)
 
     def checkServerTasks(self):
-        self.fetchTasks()
+        # 上一次轮询或用户操作仍在进行时跳过本次定时检查
+        if self.runner.isBusy() or self.pendingStatus:
+            return
+        self.runner.run(self.task_handler.fetch_tasks_if_changed,
+                        on_done=self.onServerTasksChecked)
+
+    def onServerTasksChecked(self, tasks):
+        # 服务器无变化时跳过表格重建
+        if tasks is None:
+            return
+        self.onTasksFetched(tasks)
 
     def showAbout(self):
         aboutDlg = AboutDialog(self.translations, self)
         aboutDlg.exec_()
 
-    def checkRecurringTasksExpiry(self):
+    def checkRecurringTasksExpiry(self, tasks=None):
         """检查周期任务是否已到期，如果到期则自动将 due 更新为下一次的时间"""
         now = datetime.datetime.now()
-        tasks_updated = False
-        print(f"[DEBUG] checkRecurringTasksExpiry called, checking {len(self.tasks)} tasks")
-        
+        if tasks is None:
+            tasks = self.tasks
+        print(f"[DEBUG] checkRecurringTasksExpiry called, checking {len(tasks)} tasks")
+
+        # 一次遍历收集所有到期的任务
+        changes = {(uid, summary): (uid, summary, fields)
+                   for uid, summary, fields in TaskHandler.recurring_changes(tasks, now)}
+        if not changes:
+            return
+
+        # 界面先更新内存中的副本（表格只重绘这些行），服务器和本地文件各批量写入一次
+        rolled = []
         for task in self.tasks:
-            rrule_val = getattr(task, 'rrule', None) or (task.get('rrule') if isinstance(task, dict) else None)
-            
-            interval_minutes = 0
-            if rrule_val:
-                 interval_minutes = parse_rrule_to_minutes(rrule_val) or 0
-                 
-            status = getattr(task, 'status', 'NEEDS-ACTION')
-            
-            print(f"[DEBUG] Task '{task.summary}': rrule={rrule_val}, due={task.due}, status={status}")
-            
-            # 跳过已完成的任务
-            if status == 'COMPLETED':
-                continue
-            
-            if not rrule_val or not interval_minutes or not task.due:
-                continue
-            
-            # 确保 task_due 是 datetime 对象
-            task_due = task.due
-            if isinstance(task_due, str):
-                try:
-                    task_due = datetime.datetime.strptime(task_due, "%Y-%m-%dT%H:%M:%S")
-                except Exception:
-                    continue
-            
-            print(f"[DEBUG] Comparing: task_due={task_due} vs now={now}")
-            
-            # 如果任务已到期
-            if task_due <= now:
-                # 计算下一个到期时间（使用分钟）
-                interval = datetime.timedelta(minutes=interval_minutes)
-                new_due = task_due
-                while new_due <= now:
-                    new_due = new_due + interval
-                
-                print(f"[DEBUG] Task expired! Updating due to next occurrence: {new_due}")
-                
-                # 更新任务的 due 时间为下一次
-                task_data = {
-                    "summary": task.summary,
-                    "description": task.description if task.description else "",
-                    "priority": task.priority,
-                    "due": new_due,
-                    "rrule": rrule_val
-                }
-                self.task_handler.update_task(task.uid, task_data)
-                
-                tasks_updated = True
-        
-        if tasks_updated:
-            self.fetchTasks()
+            change = changes.get((task.uid, task.summary))
+            if change is not None:
+                task = task.copy()
+                task.update(change[2])
+            rolled.append(task)
+        self.tasks = rolled
+        self.refreshTaskTable()
+        self.runner.run(self.task_handler.update_tasks, list(changes.values()))
 
 
 if __name__ == "__main__":
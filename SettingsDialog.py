@@ -76,7 +76,9 @@ class SettingsDialog(QtWidgets.QDialog):
         layout.addRow(buttonBox)
 
     def saveConfig(self):
-        new_config = {
+        # 保留对话框中未列出的高级配置项（如 incremental_sync）
+        new_config = dict(self.config)
+        new_config.update({
             "tasks_json_path": self.tasksPathEdit.text(),
             "icon_path": self.iconPathEdit.text(),
             "url": self.urlEdit.text(),
@@ -87,7 +89,7 @@ class SettingsDialog(QtWidgets.QDialog):
             "ssl_verify_cert": self.sslVerifyCheck.isChecked(),
             "offline_mode": self.offlineModeCheck.isChecked(),
             "language": "zh" if self.config.get("language", "en") == "zh" else "en"
-        }
+        })
         try:
             with open(self.conf_path, "w", encoding="utf-8") as f:
                 json.dump(new_config, f, ensure_ascii=False, indent=4)
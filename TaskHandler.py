@@ -3,191 +3,449 @@
 # ---------------------------
 
 
-from local_tasks import load_local_tasks, save_local_tasks
-from nextcloudtasks import Todo
+import datetime
+import os
+import sys
+import uuid
+from local_tasks import open_task_store, load_sync_state, save_sync_state
+from nextcloudtasks import (Todo, SyncTokenExpired, SyncNotSupported, TaskNotFound, href_key,
+                            next_occurrence, rebase_rrule, todo_is_pending)
+from outbox import open_outbox
+from task_record import TaskRecord, parse_due
 
 class TaskHandler:
     def __init__(self, config, tasks_path, nc_client):
         self.config = config
         self.tasks_path = tasks_path
         self.nc_client = nc_client
+        # 本地存储：tasks.json（默认）或 SQLite
+        self.store = open_task_store(tasks_path, config)
+        # 服务器调用失败时待重放的操作
+        # 发件箱跟随 tasks_json_path 而不是存储文件，切换存储方式时不会丢失
+        self.outbox = open_outbox(tasks_path)
         self.offline_mode = config["offline_mode"]
+        self.incremental_sync = config.get("incremental_sync", True)
+        # 批量推送时的并发请求数
+        self.sync_workers = int(config.get("sync_workers", 8))
 
     def fetch_tasks(self):
         if self.offline_mode:
-            tasks_list = load_local_tasks(self.tasks_path)
-            tasks = [self._create_task_object(t) for t in tasks_list]
-            return tasks
+            return self.store.load()
         else:
             try:
-                self.nc_client.updateTodos()
-                todos = self.nc_client.todos
-                server_tasks = [Todo(t.data) for t in todos]
-                tasks_dict_list = [task.to_dict() for task in server_tasks]
-                
-                print(f"[DEBUG] fetch_tasks: received {len(tasks_dict_list)} tasks from server")
-                
-                save_local_tasks(tasks_dict_list, self.tasks_path)
-                # 返回包含周期字段的任务对象
-                tasks = [self._create_task_object(t) for t in tasks_dict_list]
-                return tasks
+                return self.download_tasks()
             except Exception as e:
-                tasks_list = load_local_tasks(self.tasks_path)
-                tasks = [self._create_task_object(t) for t in tasks_list]
-                return tasks
+                return self.store.load()
 
-    def add_task(self, task_data):
+    def download_tasks(self):
+        """
+        Send the outbox, then download the server's tasks into the local
+        store and return them. Raises if the server cannot be reached;
+        changes that could not be sent stay in the outbox.
+        """
+        # 先把离线期间积累的修改发送出去
+        self.flush_outbox()
+        tasks = None
+        if self.incremental_sync:
+            try:
+                tasks = self._sync_tasks()
+            except SyncNotSupported:
+                print("[DEBUG] fetch_tasks: sync-collection not supported, falling back to full fetch", file=sys.stderr)
+                self.incremental_sync = False
+        if tasks is None:
+            tasks = self._server_tasks()
+
+            print(f"[DEBUG] fetch_tasks: received {len(tasks)} tasks from server", file=sys.stderr)
+
+            self.outbox.apply(tasks)
+            self.store.save(tasks)
+        return tasks
+
+    def _server_tasks(self):
+        """重新获取服务器任务列表并转换为 TaskRecord"""
+        self.nc_client.updateTodos()
+        return [TaskRecord.from_todo(Todo(t.data)) for t in self.nc_client.todos]
+
+    def fetch_tasks_if_changed(self):
+        """
+        供定时轮询使用：先用一次 PROPFIND 比较日历的 sync-token/ctag，
+        没有变化时返回 None，调用方可跳过下载、解析和界面刷新。
+        """
         if self.offline_mode:
-            tasks = load_local_tasks(self.tasks_path)
-            tasks.append(task_data)
-            save_local_tasks(tasks, self.tasks_path)
+            return self.fetch_tasks()
+        try:
+            changed = self.server_changed()
+        except Exception as e:
+            print(f"[DEBUG] fetch_tasks_if_changed: tag check failed: {e}", file=sys.stderr)
+            return None
+        return self.fetch_tasks() if changed else None
+
+    def server_changed(self):
+        """
+        Whether download_tasks() has anything to do: the outbox is not
+        empty or the calendar's sync-token/ctag differs from the last sync
+        (one PROPFIND). Raises if the server cannot be reached.
+        """
+        if len(self.outbox):
+            # 有待发送的操作时每次都尝试重放
+            return True
+        tag = self.nc_client.getCalendarTag()
+        if tag is None:
+            return True
+        seen = self.nc_client.ctag
+        if seen is None and self.incremental_sync:
+            seen = load_sync_state(self.store.path).get("sync_token")
+        return tag != seen
+
+    def _sync_tasks(self):
+        """
+        增量同步：只向服务器请求上次 sync-token 之后变化和删除的资源，
+        并就地修补本地任务列表。没有可用 token 时做一次完整的初始同步。
+        """
+        state = load_sync_state(self.store.path)
+        token = state.get("sync_token")
+        try:
+            changed, removed, new_token = self.nc_client.syncTodos(token)
+        except SyncTokenExpired:
+            print("[DEBUG] fetch_tasks: sync-token expired, running initial sync", file=sys.stderr)
+            token = None
+            changed, removed, new_token = self.nc_client.syncTodos(None)
+
+        if token:
+            hrefs = state.get("hrefs", {})
+            tasks = self.store.load()
         else:
-            try:
-                self.nc_client.addTodo(task_data["summary"],
-                                       priority=task_data["priority"],
-                                       percent_complete=0)
-                self.nc_client.updateTodos()
-                uid = self.nc_client.getUidbySummary(task_data["summary"])
-                note = task_data.get('description', '')
-                # 确保 due 为 datetime 对象
-                due_value = task_data.get('due')
-                try:
-                    import datetime as _dt
-                    if isinstance(due_value, str):
-                        due_value = _dt.datetime.strptime(due_value, "%Y-%m-%dT%H:%M:%S")
-                except Exception:
-                    pass
-                
-                # Extract RRULE - 如果没有 rrule 则传空字符串以清除服务器端的 RRULE
-                rrule_val = task_data.get('rrule')
-                if not rrule_val:
-                      rrule_val = ""
-
-                self.nc_client.updateTodo(uid,
-                                          note=note,
-                                          due=due_value,
-                                          priority=task_data["priority"],
-                                          rrule=rrule_val)
-                # 保存周期任务设置到本地
-                task_data["uid"] = uid
-                tasks = load_local_tasks(self.tasks_path)
-                # 更新或添加任务
-                found = False
-                for t in tasks:
-                    if t.get("uid") == uid:
-                        t.update(task_data)
-                        found = True
-                        break
-                if not found:
-                    tasks.append(task_data)
-                save_local_tasks(tasks, self.tasks_path)
-            except Exception as e:
-                tasks = load_local_tasks(self.tasks_path)
-                tasks.append(task_data)
-                save_local_tasks(tasks, self.tasks_path)
+            # 初始同步以服务器为准，替换整个本地列表
+            hrefs = {}
+            tasks = []
+
+        index = {t.uid: i for i, t in enumerate(tasks) if t.uid}
+        removed_uids = set()
+        for href in removed:
+            uid = hrefs.pop(href, None)
+            if uid is None:
+                # 由本客户端创建的资源名为 <uid>.ics，可据此推断 uid
+                name = os.path.basename(href)
+                uid = name[:-4] if name.endswith(".ics") else None
+            if uid:
+                removed_uids.add(uid)
+
+        changed_uids = set()
+        for obj in changed:
+            task = TaskRecord.from_todo(Todo(obj.data))
+            hrefs[href_key(obj.url)] = task.uid
+            changed_uids.add(task.uid)
+            removed_uids.discard(task.uid)
+            if task.uid in index:
+                tasks[index[task.uid]] = task
+            else:
+                index[task.uid] = len(tasks)
+                tasks.append(task)
+
+        if token and not changed and not removed and new_token == token:
+            return tasks
+
+        if removed_uids:
+            tasks = [t for t in tasks if t.uid not in removed_uids]
+
+        print(f"[DEBUG] fetch_tasks: sync received {len(changed)} changed, {len(removed)} removed", file=sys.stderr)
+
+        self.outbox.apply(tasks)
+        if token:
+            # 只写入变化的任务，不重写整个本地存储
+            self.store.merge([t for t in tasks if t.uid in changed_uids], removed_uids)
+        else:
+            self.store.save(tasks)
+        save_sync_state({"sync_token": new_token, "hrefs": hrefs}, self.store.path)
+        return tasks
+
+    def add_task(self, task_data):
+        task = TaskRecord.from_dict(task_data)
+        if not self.offline_mode:
+            # 在本地生成 UID，离线时后续的修改和删除也能在发件箱中按 uid 合并
+            task.uid = task.uid or str(uuid.uuid4())
+            # 一次 PUT 创建完整的 VTODO
+            self._send(task.uid,
+                       lambda: self.nc_client.addTodo(**self._add_args(task.uid, task_data)),
+                       lambda: self.outbox.add(task.uid, task_data))
+        # 保存周期任务设置到本地
+        self.store.add(task)
+        return task.uid
+
+    def _send(self, uid, call, queue):
+        """
+        Run a server call for uid. If the server cannot be reached, or
+        earlier changes of uid are still waiting in the outbox, queue() puts
+        the operation in the outbox instead. Returns True if it was sent.
+        """
+        if len(self.outbox):
+            self.flush_outbox()
+        if self.outbox.has(uid):
+            queue()
+            return False
+        try:
+            call()
+            return True
+        except TaskNotFound as e:
+            print(f"[DEBUG] {uid}: {e}", file=sys.stderr)
+            return False
+        except Exception as e:
+            print(f"[DEBUG] server call for {uid} failed, queued in outbox: {e}", file=sys.stderr)
+            queue()
+            return False
+
+    def flush_outbox(self):
+        """
+        Replay the outbox: one request per queued task, sent concurrently
+        (at most sync_workers at a time). Entries that reached the server,
+        or whose task no longer exists there, are removed. Returns True if
+        the outbox is empty afterwards.
+        """
+        if self.offline_mode or not len(self.outbox):
+            return not len(self.outbox)
+        entries = list(self.outbox.entries)
+        adds = [e for e in entries if e["op"] == "add"]
+        updates = [e for e in entries if e["op"] == "update"]
+        deletes = [e for e in entries if e["op"] == "delete"]
+        done = []
+        try:
+            if adds:
+                results = self.nc_client.addTodos(
+                    [self._add_args(e["uid"], e["fields"]) for e in adds], self.sync_workers)
+                done += [e["uid"] for e, r in zip(adds, results) if not isinstance(r, Exception)]
+            if updates:
+                results = self.nc_client.updateTodosBatch(
+                    [(e["uid"], self._update_args(e["fields"])) for e in updates], self.sync_workers)
+                done += [e["uid"] for e, r in zip(updates, results)
+                         if r is None or isinstance(r, TaskNotFound)]
+            if deletes:
+                results = self.nc_client.deleteByUids([e["uid"] for e in deletes])
+                done += [e["uid"] for e, r in zip(deletes, results)
+                         if r is None or isinstance(r, TaskNotFound)]
+        except Exception as e:
+            print(f"[DEBUG] flush_outbox: server unreachable: {e}", file=sys.stderr)
+        self.outbox.remove(done)
+        print(f"[DEBUG] flush_outbox: sent {len(done)}, {len(self.outbox)} still queued", file=sys.stderr)
+        return not len(self.outbox)
 
-    def update_task(self, uid, task_data):
+    @staticmethod
+    def _add_args(uid, fields):
+        """addTodo keyword arguments from TaskRecord-style fields."""
+        priority = fields.get("priority")
+        return {"summary": fields.get("summary") or "",
+                "priority": priority if priority is not None else 0,
+                "percent_complete": fields.get("percent_complete") or 0,
+                "rrule": fields.get("rrule") or None,
+                "due": parse_due(fields.get("due")),
+                "note": fields.get("description") or "",
+                "uid": uid}
+
+    @staticmethod
+    def _update_args(fields):
+        """updateTodo keyword arguments for the fields that were changed."""
+        args = {}
+        if "summary" in fields:
+            args["summary"] = fields["summary"]
+        if "description" in fields:
+            args["note"] = fields["description"] or ""
+        if "due" in fields:
+            args["due"] = parse_due(fields["due"])
+        if "priority" in fields:
+            args["priority"] = fields["priority"]
+        if "percent_complete" in fields:
+            args["percent_complete"] = fields["percent_complete"]
+        if "rrule" in fields:
+            args["rrule"] = fields["rrule"] or ""
+        return args
+
+    def push_local_tasks(self):
+        """
+        把本地 tasks.json 中的全部任务推送到服务器，然后用服务器数据覆盖本地文件。
+
+        新任务通过并发 PUT 创建；已有任务先用 calendar-multiget 批量读取，
+        修改后以最多 sync_workers 个并发 PUT 写回；最后只重新获取一次。
+        服务器不可达时抛出异常。返回每个任务的结果列表
+        [(summary, uid, error)]，成功时 error 为 None。
+        """
+        # 一次轻量请求确认服务器可达
+        self.nc_client.getCalendarTag()
+        # 发件箱中的新建任务在本地已有 uid，必须先创建，否则会被当作已有任务更新
+        self.flush_outbox()
+
+        local_tasks = self.store.load()
+        new_tasks = []
+        new_items = []
+        updated_tasks = []
+        updates = []
+        for task in local_tasks:
+            if not task.uid:
+                new_tasks.append(task)
+                new_items.append({"summary": task.summary,
+                                  "priority": task.priority,
+                                  "percent_complete": task.percent_complete or 0,
+                                  "rrule": task.rrule or None,
+                                  "due": task.due,
+                                  "note": task.description or ''})
+            else:
+                updated_tasks.append(task)
+                updates.append((task.uid, {"summary": task.summary,
+                                           "note": task.description or '',
+                                           "due": task.due,
+                                           "priority": task.priority,
+                                           "percent_complete": task.percent_complete or 0,
+                                           # Push rrule if available locally
+                                           "rrule": task.rrule or ""}))
+
+        results = []
+        if new_items:
+            for task, result in zip(new_tasks, self.nc_client.addTodos(new_items, self.sync_workers)):
+                if isinstance(result, Exception):
+                    results.append((task.summary, None, result))
+                else:
+                    task.uid = result
+                    results.append((task.summary, result, None))
+        if updates:
+            for task, result in zip(updated_tasks, self.nc_client.updateTodosBatch(updates, self.sync_workers)):
+                results.append((task.summary, task.uid, result))
+
+        for summary, uid, error in results:
+            if error is not None:
+                print(f"[DEBUG] push_local_tasks: {summary}: {error}", file=sys.stderr)
+
+        # 直接使用服务器数据保存
+        self.store.save(self.outbox.apply(self._server_tasks()))
+        return results
+
+    def load_server_and_local_tasks(self):
+        """下载服务器上的全部任务，返回 (服务器任务列表, 本地任务列表)"""
+        # 先把离线期间积累的修改发送出去
+        self.flush_outbox()
+        return self.outbox.apply(self._server_tasks()), self.store.load()
+
+    def update_task(self, uid, task_data, summary=None):
         import datetime as dt
-        print(f"[DEBUG] update_task called with uid={uid}")
-        print(f"[DEBUG] task_data: rrule={task_data.get('rrule')}")
+        print(f"[DEBUG] update_task called with uid={uid}", file=sys.stderr)
+        print(f"[DEBUG] task_data: rrule={task_data.get('rrule')}", file=sys.stderr)
         
         if self.offline_mode:
-            tasks = load_local_tasks(self.tasks_path)
-            updated = False
-            for t in tasks:
-                if t.get("uid") == uid:
-                    t.update(task_data)
-                    updated = True
-                    break
-            if updated:
-                save_local_tasks(tasks, self.tasks_path)
-                print(f"[DEBUG] Saved to local (offline mode)")
+            # 没有 uid 的本地任务按原名称查找
+            self.store.update(uid, summary, task_data)
+            print(f"[DEBUG] Saved to local (offline mode)", file=sys.stderr)
         else:
-            try:
-                # 确保 due 是 datetime 对象
-                due_value = task_data.get("due")
-                if isinstance(due_value, str):
-                    try:
-                        due_value = dt.datetime.strptime(due_value, "%Y-%m-%dT%H:%M:%S")
-                    except Exception:
-                        pass # keep valid string? Or datetime? nc_client expects datetime mostly.
-
-                # Get RRULE directly - 如果没有 rrule 则传空字符串以清除服务器端的 RRULE
-                rrule_val = task_data.get("rrule")
-                if not rrule_val:
-                     rrule_val = ""
-
-                # Note is just the user description
-                note = task_data.get("description", "")
-
-                print(f"[DEBUG] Calling nc_client.updateTodo with due={due_value}, rrule={rrule_val}")
-                
-                self.nc_client.updateTodo(uid,
-                                          summary=task_data["summary"],
-                                          note=note,
-                                          due=due_value,
-                                          priority=task_data["priority"],
-                                          rrule=rrule_val)
-                print(f"[DEBUG] Server update successful")
-
-                # 保存到本地，并更新 last_modified
-                now_str = dt.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-                tasks = load_local_tasks(self.tasks_path)
-                for t in tasks:
-                    if t.get("uid") == uid:
-                        t.update(task_data)
-                        t['last_modified'] = now_str
-                        # 设置 rrule
-                        t['rrule'] = rrule_val if rrule_val else None
-                        print(f"[DEBUG] Updated local task: rrule={t.get('rrule')}")
-                        break
-                save_local_tasks(tasks, self.tasks_path)
-                print(f"[DEBUG] Saved to local file")
-            except Exception as e:
-                print(f"[DEBUG] Server update failed: {e}")
-                tasks = load_local_tasks(self.tasks_path)
-                for t in tasks:
-                    if t.get("uid") == uid:
-                        t.update(task_data)
-                        break
-                save_local_tasks(tasks, self.tasks_path)
+            due_value = parse_due(task_data.get("due"))
+
+            # Get RRULE directly - 如果没有 rrule 则传空字符串以清除服务器端的 RRULE
+            rrule_val = task_data.get("rrule")
+            if not rrule_val:
+                 rrule_val = ""
+
+            # Note is just the user description
+            note = task_data.get("description", "")
+
+            fields = dict(task_data)
+            # 设置 rrule
+            fields['rrule'] = rrule_val if rrule_val else None
+            if uid:
+                print(f"[DEBUG] Calling nc_client.updateTodo with due={due_value}, rrule={rrule_val}", file=sys.stderr)
+                sent = self._send(uid,
+                                  lambda: self.nc_client.updateTodo(uid,
+                                                                    summary=task_data["summary"],
+                                                                    note=note,
+                                                                    due=due_value,
+                                                                    priority=task_data["priority"],
+                                                                    rrule=rrule_val),
+                                  lambda: self.outbox.update(uid, fields))
+                if sent:
+                    print(f"[DEBUG] Server update successful", file=sys.stderr)
+                    # 保存到本地，并更新 last_modified
+                    fields['last_modified'] = dt.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+            self.store.update(uid, summary, fields)
+            print(f"[DEBUG] Saved to local file: rrule={fields['rrule']}", file=sys.stderr)
 
     def delete_task(self, uid, summary):
         if not self.offline_mode and uid:
-            try:
-                self.nc_client.deleteByUid(uid)
-            except Exception as e:
-                pass
-        tasks = load_local_tasks(self.tasks_path)
-        if uid:
-            tasks = [t for t in tasks if t.get("uid") != uid]
-        else:
-            tasks = [t for t in tasks if t.get("summary") != summary]
-        save_local_tasks(tasks, self.tasks_path)
+            self._send(uid,
+                       lambda: self.nc_client.deleteByUid(uid),
+                       lambda: self.outbox.delete(uid))
+        self.store.delete(uid, summary)
 
     def update_status(self, uid, summary, new_status, percent_complete):
-        tasks = load_local_tasks(self.tasks_path)
-        for t in tasks:
-            if (uid and t.get("uid") == uid) or (not uid and t.get("summary") == summary):
-                t["status"] = new_status
-                t["percent_complete"] = percent_complete
-                break
-        save_local_tasks(tasks, self.tasks_path)
-        if not self.offline_mode and uid:
-            try:
-                self.nc_client.updateTodo(
-                    uid, percent_complete=percent_complete)
-            except Exception as e:
-                pass
-
-    def _create_task_object(self, t):
-        task = type("LocalTask", (), {})()
-        task.summary = t.get("summary", "")
-        task.uid = t.get("uid", "")
-        task.priority = t.get("priority", "")
-        task.due = t.get("due", None)
-        task.description = t.get("description", "")
-        task.status = t.get("status", "NEEDS-ACTION")
-        task.rrule = t.get("rrule", "")
-        return task
+        self.update_statuses([(uid, summary, new_status, percent_complete)])
+
+    def update_statuses(self, changes):
+        """
+        Apply several completion changes, given as (uid, summary, status,
+        percent_complete), as one update_tasks() batch.
+        """
+        self.update_tasks([(uid, summary, {"status": status, "percent_complete": percent})
+                           for uid, summary, status, percent in changes])
+
+    def update_tasks(self, changes):
+        """
+        Apply field changes to several tasks, given as (uid, summary,
+        fields): one local write and one batched server update of just
+        those fields, without refetching the calendar. The tasks that were
+        sent are then stored as the server has them (completed ones are
+        dropped, like in the server's list). Changes that cannot be sent
+        are queued in the outbox.
+        """
+        self.store.update_many(changes)
+        if self.offline_mode:
+            return
+        if len(self.outbox):
+            self.flush_outbox()
+        direct = []
+        for uid, summary, fields in changes:
+            if not uid:
+                continue
+            if self.outbox.has(uid):
+                # 排在之前未发送的操作之后
+                self.outbox.update(uid, fields)
+            else:
+                direct.append((uid, fields))
+        if not direct:
+            return
+        saved = {}
+        try:
+            results = self.nc_client.updateTodosBatch(
+                [(uid, self._update_args(fields)) for uid, fields in direct],
+                self.sync_workers, saved)
+        except Exception as e:
+            results = [e] * len(direct)
+        for (uid, fields), result in zip(direct, results):
+            if result is not None and not isinstance(result, TaskNotFound):
+                print(f"[DEBUG] update for {uid} failed, queued in outbox: {result}", file=sys.stderr)
+                self.outbox.update(uid, fields)
+        if saved:
+            # 用写入服务器的数据（含 LAST-MODIFIED）更新本地记录，下次启动比较时两边一致
+            self.store.merge([TaskRecord.from_todo(Todo(data)) for data in saved.values() if todo_is_pending(data)],
+                             {uid for uid, data in saved.items() if not todo_is_pending(data)})
+
+    @staticmethod
+    def recurring_changes(tasks, now):
+        """
+        update_tasks() changes that move every open recurring task whose
+        DUE has passed to its next occurrence. Series that have ended are
+        left alone.
+        """
+        changes = []
+        for task in tasks:
+            if task.status == 'COMPLETED' or not task.rrule or not task.due or task.due > now:
+                continue
+            new_due = next_occurrence(task.rrule, task.due, now)
+            if new_due is None:
+                continue
+            print(f"[DEBUG] Task '{task.summary}' expired! Updating due to next occurrence: {new_due}", file=sys.stderr)
+            changes.append((task.uid, task.summary, {
+                "due": new_due,
+                # COUNT 是从原截止时间算起的，移动后改写为等价的 UNTIL
+                "rrule": rebase_rrule(task.rrule, task.due),
+            }))
+        return changes
 
+    def roll_forward_recurring(self):
+        """Roll the expired recurring tasks of the local store forward; returns how many."""
+        changes = self.recurring_changes(self.store.load(), datetime.datetime.now())
+        if changes:
+            self.update_tasks(changes)
+        return len(changes)
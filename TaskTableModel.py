@@ -0,0 +1,444 @@
+# ---------------------------
+# 任务表格模型：按需计算显示内容，刷新时按 uid 只更新变化的行
+# ---------------------------
+
+
+import time
+from itertools import compress
+from PyQt5 import QtCore
+from task_record import TaskRecord
+from task_search import TaskSearchIndex, search_text
+from TaskWorker import TaskWorker
+
+COLUMNS = ("completed", "task_name", "priority", "deadline", "task_detail")
+# 排序时使用的数据角色
+SORT_ROLE = QtCore.Qt.UserRole + 1
+# 列 -> sort_key() 元组中的位置（详情列不参与排序）
+SORT_FIELDS = {0: 0, 1: 3, 2: 1, 3: 2}
+NO_DUE = float("inf")
+# 优先级筛选：名称 -> (最小值, 最大值)，与表格中显示的分档一致
+PRIORITY_BANDS = {
+    "priority_extremely_high": (0, 0),
+    "priority_high": (1, 3),
+    "priority_medium": (4, 6),
+    "priority_low": (7, 9),
+}
+
+
+def row_key(task, seen):
+    """uid, or for local tasks without one the summary plus its occurrence number."""
+    if task.uid:
+        return task.uid
+    n = seen.get(task.summary, 0)
+    seen[task.summary] = n + 1
+    return ("", task.summary, n)
+
+
+def sort_key(task, due):
+    """
+    Typed sort values for one task, computed once per row:
+    (completed flag, priority as int, due as epoch seconds, casefolded summary).
+    due is the displayed due (next occurrence for recurring tasks).
+    """
+    try:
+        priority = int(task.priority)
+    except Exception:
+        priority = 100  # 默认较低优先级
+    return (1 if task.status == "COMPLETED" else 0,
+            priority,
+            due.timestamp() if due else NO_DUE,
+            (task.summary or "").casefold())
+
+
+def _values(task):
+    return tuple(getattr(task, name) for name in TaskRecord.FIELDS)
+
+
+def _ranges(rows):
+    """Group sorted row numbers into (first, last) runs."""
+    runs = []
+    for row in rows:
+        if runs and runs[-1][1] == row - 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return runs
+
+
+class TaskTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model over a list of TaskRecords. Cell text is computed in
+    data() when the view asks for it, so only visible rows cost anything.
+
+    setTasks() diffs the new list against the current rows by uid and
+    emits removeRows/dataChanged/insertRows for just the rows that
+    differ, which keeps the view's sort order, selection and scroll
+    position across refreshes.
+
+    Toggling the checkbox in column 0 updates the task in place and emits
+    statusToggled(task).
+
+    Sort values are precomputed per row (sortKeys, see sort_key()) and
+    kept up to date with the rows, so sorting never formats or parses
+    anything. The TaskSearchIndex behind search() is built on the thread
+    pool when the first tasks arrive, then updated with the same row
+    diffs; rows changed while it is being built are applied when it is
+    done, and until then search() scans the texts directly.
+    """
+    statusToggled = QtCore.pyqtSignal(object)
+
+    def __init__(self, translations, language, display_due, parent=None):
+        super(TaskTableModel, self).__init__(parent)
+        self.translations = translations
+        self.language = language
+        # 计算周期任务下一次截止时间的函数
+        self.display_due = display_due
+        self.tasks = []
+        self.keys = []
+        self.sortKeys = []
+        self._searchIndex = None
+        self._indexWorker = None
+        self._indexDirty = set()   # 索引构建期间变化的行
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.translations[COLUMNS[section]].replace(":", "")
+        return super(TaskTableModel, self).headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= QtCore.Qt.ItemIsUserCheckable
+        return flags
+
+    def taskAt(self, row):
+        return self.tasks[row]
+
+    def search(self, query):
+        """Keys of the rows matching every word of query, or None for an empty query."""
+        if self._searchIndex is not None:
+            return self._searchIndex.search(query)
+        self.buildSearchIndex()
+        # 索引尚未建好时直接逐行查找子串，结果与索引相同
+        words = query.casefold().split()
+        if not words:
+            return None
+        return {key for key, task in zip(self.keys, self.tasks)
+                if all(word in search_text(task) for word in words)}
+
+    def buildSearchIndex(self):
+        """Start building the search index in the background, unless it exists or is being built."""
+        if self._searchIndex is not None or self._indexWorker is not None:
+            return
+        worker = TaskWorker(TaskSearchIndex.build, list(zip(self.keys, self.tasks)))
+        worker.signals.finished.connect(self._onIndexBuilt)
+        worker.signals.error.connect(self._onIndexFailed)
+        self._indexWorker = worker
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _onIndexBuilt(self, index):
+        if self._indexDirty:
+            current = dict(zip(self.keys, self.tasks))
+            for key in self._indexDirty:
+                if key in current:
+                    index.set(key, current[key])
+                else:
+                    index.remove(key)
+        self._indexDirty = set()
+        self._indexWorker = None
+        self._searchIndex = index
+
+    def _onIndexFailed(self, error):
+        self._indexDirty = set()
+        self._indexWorker = None
+
+    def _indexChanged(self, key, task):
+        """Keep the search index in step with a row; task is None for a removed row."""
+        if self._searchIndex is not None:
+            if task is None:
+                self._searchIndex.remove(key)
+            else:
+                self._searchIndex.set(key, task)
+        elif self._indexWorker is not None:
+            self._indexDirty.add(key)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self.tasks[index.row()]
+        column = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if column == 1:
+                return task.summary
+            if column == 2:
+                return self._priorityText(task.priority)
+            if column == 3:
+                due = self.display_due(task)
+                return due.strftime('%Y-%m-%d %H:%M') if due else self.translations["no_due"]
+            if column == 4:
+                if task.description:
+                    return task.description
+                return "无" if self.language == "zh" else "None"
+        elif role == QtCore.Qt.CheckStateRole and column == 0:
+            return QtCore.Qt.Checked if task.status == "COMPLETED" else QtCore.Qt.Unchecked
+        elif role == QtCore.Qt.UserRole and column == 1:
+            return task.uid
+        elif role == SORT_ROLE and column in SORT_FIELDS:
+            return self.sortKeys[index.row()][SORT_FIELDS[column]]
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if role != QtCore.Qt.CheckStateRole or index.column() != 0:
+            return False
+        task = self.tasks[index.row()]
+        checked = value == QtCore.Qt.Checked
+        task.status = "COMPLETED" if checked else "NEEDS-ACTION"
+        task.percent_complete = 100 if checked else 0
+        self.sortKeys[index.row()] = self._sortKey(task)
+        self.dataChanged.emit(index, index, [role])
+        self.statusToggled.emit(task)
+        return True
+
+    def _priorityText(self, priority):
+        try:
+            p_val = int(priority)
+        except Exception:
+            return str(priority)
+        if p_val == 0:
+            return self.translations.get("priority_extremely_high", "极高")
+        if 1 <= p_val <= 3:
+            return self.translations.get("priority_high", "高")
+        if 4 <= p_val <= 6:
+            return self.translations.get("priority_medium", "中")
+        if 7 <= p_val <= 9:
+            return self.translations.get("priority_low", "低")
+        return str(p_val)
+
+    def _sortKey(self, task):
+        return sort_key(task, self.display_due(task))
+
+    def setTranslations(self, translations, language):
+        self.translations = translations
+        self.language = language
+        self.headerDataChanged.emit(QtCore.Qt.Horizontal, 0, len(COLUMNS) - 1)
+        if self.tasks:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(len(self.tasks) - 1, len(COLUMNS) - 1))
+
+    def setTasks(self, tasks):
+        """Show tasks, emitting row changes only for what differs by uid."""
+        seen = {}
+        keys = [row_key(task, seen) for task in tasks]
+        incoming = dict(zip(keys, tasks))
+
+        # 1. 删除不再存在的行，从下往上按连续区间删除
+        gone = [row for row, key in enumerate(self.keys) if key not in incoming]
+        for row in gone:
+            self._indexChanged(self.keys[row], None)
+        for first, last in reversed(_ranges(gone)):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self.tasks[first:last + 1]
+            del self.keys[first:last + 1]
+            del self.sortKeys[first:last + 1]
+            self.endRemoveRows()
+
+        # 2. 原地更新内容变化的行；周期任务的显示截止时间随时间变化，一并重算
+        changed = []
+        for row, key in enumerate(self.keys):
+            task = incoming[key]
+            if _values(task) != _values(self.tasks[row]):
+                changed.append(row)
+                self.sortKeys[row] = self._sortKey(task)
+                self._indexChanged(key, task)
+            elif task.rrule:
+                self.sortKeys[row] = self._sortKey(task)
+            # 始终换成新的对象，与调用方的列表保持同一份数据
+            self.tasks[row] = task
+        for first, last in _ranges(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(COLUMNS) - 1))
+
+        # 3. 新任务追加到末尾（排序由视图的代理模型负责）
+        present = set(self.keys)
+        added = [(key, task) for key, task in zip(keys, tasks) if key not in present]
+        if added:
+            first = len(self.tasks)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(added) - 1)
+            self.keys.extend(key for key, _ in added)
+            self.tasks.extend(task for _, task in added)
+            self.sortKeys.extend(self._sortKey(task) for _, task in added)
+            for key, task in added:
+                self._indexChanged(key, task)
+            self.endInsertRows()
+        if self.tasks:
+            self.buildSearchIndex()
+        print(f"[DEBUG] TaskTableModel: {len(gone)} removed, {len(changed)} changed, {len(added)} added")
+
+
+class TaskProxyModel(QtCore.QAbstractProxyModel):
+    """
+    Sorted and filtered view of a TaskTableModel, supporting several sort
+    columns.
+
+    QSortFilterProxyModel compares rows one pair at a time through
+    data(), which costs a Python call per comparison. Here the visible
+    order is a plain list of source rows, re-sorted with sorted() over
+    the source model's precomputed sortKeys. Source changes are applied
+    as layout changes, with persistent indexes (selection, current row)
+    moved to their new positions.
+
+    setFilter() narrows the rows by search text (through the source
+    model's search()), status, priority band and overdue, using the
+    same precomputed sort keys instead of looking at the tasks.
+    """
+
+    def __init__(self, parent=None):
+        super(TaskProxyModel, self).__init__(parent)
+        self.rows = []        # 视图行 -> 源行
+        self.position = {}    # 源行 -> 视图行
+        # [(列, 顺序)]，第一项为主排序列
+        self.sortColumns = []
+        self.query = ""
+        self.status = None      # None / "open" / "completed"
+        self.band = None        # PRIORITY_BANDS 中的名称
+        self.overdue = False
+        self._saved = None
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super(TaskProxyModel, self).setSourceModel(model)
+        model.dataChanged.connect(self._onDataChanged)
+        model.headerDataChanged.connect(self.headerDataChanged)
+        for signal in (model.rowsAboutToBeInserted, model.rowsAboutToBeRemoved,
+                       model.layoutAboutToBeChanged):
+            signal.connect(self._beforeLayout)
+        for signal in (model.rowsInserted, model.rowsRemoved, model.layoutChanged):
+            signal.connect(self._afterLayout)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._onReset)
+        self._arrange()
+        self.endResetModel()
+
+    # --- QAbstractProxyModel ---
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.rows)) or not (0 <= column < len(COLUMNS)):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        return QtCore.QModelIndex()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def mapToSource(self, index):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return QtCore.QModelIndex()
+        return self.sourceModel().index(self.rows[index.row()], index.column())
+
+    def mapFromSource(self, index):
+        row = self.position.get(index.row()) if index.isValid() else None
+        if row is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(row, index.column())
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.setSortColumns([(column, order)] if column in SORT_FIELDS else [])
+
+    # --- 排序 ---
+
+    def setSortColumns(self, columns):
+        """Sort by several (column, order) pairs, most significant first."""
+        self._beforeLayout()
+        self.sortColumns = [(c, o) for c, o in columns if c in SORT_FIELDS]
+        self._afterLayout()
+
+    # --- 筛选 ---
+
+    def setFilter(self, query="", status=None, band=None, overdue=False):
+        """Show only matching rows; the defaults show everything."""
+        self._beforeLayout()
+        self.query = query
+        self.status = status
+        self.band = band
+        self.overdue = overdue
+        self._afterLayout()
+
+    def isFiltered(self):
+        return bool(self.query.strip() or self.status or self.band or self.overdue)
+
+    def _filtered(self):
+        model = self.sourceModel()
+        keys = model.sortKeys
+        rows = range(model.rowCount())
+        matches = model.search(self.query) if self.query.strip() else None
+        if matches is not None:
+            rows = list(compress(rows, map(matches.__contains__, model.keys)))
+        if self.status:
+            done = 1 if self.status == "completed" else 0
+            rows = [row for row in rows if keys[row][0] == done]
+        if self.band:
+            low, high = PRIORITY_BANDS[self.band]
+            rows = [row for row in rows if low <= keys[row][1] <= high]
+        if self.overdue:
+            now = time.time()
+            rows = [row for row in rows if not keys[row][0] and keys[row][2] < now]
+        return list(rows)
+
+    def _arrange(self):
+        rows = self._filtered()
+        keys = self.sourceModel().sortKeys
+        # sorted() 是稳定排序：从次要列到主要列依次排序即得到多列排序结果
+        for column, order in reversed(self.sortColumns):
+            field = SORT_FIELDS[column]
+            rows.sort(key=lambda row: keys[row][field],
+                      reverse=order == QtCore.Qt.DescendingOrder)
+        self.rows = rows
+        self.position = dict(zip(rows, range(len(rows))))
+
+    def _beforeLayout(self, *args):
+        if self._saved is not None:
+            return
+        self.layoutAboutToBeChanged.emit()
+        # 以源模型的持久索引记住位置，源模型增删行时它们会自动移动
+        self._saved = [(index, QtCore.QPersistentModelIndex(self.mapToSource(index)))
+                       for index in self.persistentIndexList()]
+
+    def _afterLayout(self, *args):
+        if self._saved is None:
+            return
+        self._arrange()
+        saved, self._saved = self._saved, None
+        for index, source in saved:
+            self.changePersistentIndex(index, self.mapFromSource(QtCore.QModelIndex(source)))
+        self.layoutChanged.emit()
+
+    def _onReset(self):
+        self._saved = None
+        self._arrange()
+        self.endResetModel()
+
+    def _onDataChanged(self, topLeft, bottomRight, roles=()):
+        if (self.sortColumns or self.isFiltered()) and (not roles or QtCore.Qt.CheckStateRole in roles
+                                 or QtCore.Qt.DisplayRole in roles):
+            # 排序值可能已变化，重新排序
+            self._beforeLayout()
+            self._afterLayout()
+            return
+        rows = [self.position[row] for row in range(topLeft.row(), bottomRight.row() + 1)
+                if row in self.position]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), topLeft.column()),
+                                  self.index(max(rows), bottomRight.column()), roles)
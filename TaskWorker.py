@@ -0,0 +1,86 @@
+# ---------------------------
+# 后台任务执行：把网络 I/O 移出 Qt 界面线程
+# ---------------------------
+
+
+from PyQt5 import QtCore
+
+
+class WorkerSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+    error = QtCore.pyqtSignal(object)
+
+
+class TaskWorker(QtCore.QRunnable):
+    """在线程池中执行 fn(*args, **kwargs)，通过信号返回结果或异常"""
+
+    def __init__(self, fn, *args, **kwargs):
+        super(TaskWorker, self).__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            print(f"[DEBUG] background job {getattr(self.fn, '__name__', self.fn)} failed: {e}")
+            self.signals.error.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner(QtCore.QObject):
+    """
+    Runs TaskHandler/NextcloudTask operations on a single background thread.
+
+    Jobs execute one at a time in submission order, so mutations reach the
+    server and tasks.json in the same order the user made them. Callbacks
+    are always invoked on the GUI thread. busyChanged(True/False) is emitted
+    when the first job starts and when the queue drains.
+    """
+    busyChanged = QtCore.pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super(TaskRunner, self).__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.pending = 0
+        self._jobs = {}
+
+    def isBusy(self):
+        return self.pending > 0
+
+    def run(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        worker = TaskWorker(fn, *args, **kwargs)
+        # 持有 worker 的引用直到回调执行完毕，避免信号对象被提前回收
+        self._jobs[worker.signals] = (worker, on_done, on_error)
+        worker.signals.finished.connect(self._onFinished)
+        worker.signals.error.connect(self._onError)
+        self.pending += 1
+        if self.pending == 1:
+            self.busyChanged.emit(True)
+        self.pool.start(worker)
+
+    def waitForDone(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def _finish(self, signals, index, value):
+        job = self._jobs.pop(signals, None)
+        try:
+            if job and job[index] is not None:
+                job[index](value)
+        finally:
+            # 先执行回调再计数，回调中追加的任务不会让忙碌状态闪烁
+            self.pending -= 1
+            if self.pending == 0:
+                self.busyChanged.emit(False)
+
+    @QtCore.pyqtSlot(object)
+    def _onFinished(self, result):
+        self._finish(self.sender(), 1, result)
+
+    @QtCore.pyqtSlot(object)
+    def _onError(self, error):
+        self._finish(self.sender(), 2, error)
@@ -0,0 +1,61 @@
+"""
+Benchmark: toggling one task's status in a large local list with the json,
+journal and SQLite stores. The SQLite "open" time includes the one-time
+import of tasks.json.
+
+Usage: python benchmarks/bench_local_store.py [count]
+"""
+
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_tasks import open_task_store, save_local_tasks  # noqa: E402
+from task_record import TaskRecord  # noqa: E402
+
+
+def make_tasks(count):
+    base = datetime.datetime(2024, 1, 1, 9)
+    return [TaskRecord(summary=f"Task {i}", uid=f"uid-{i:06d}", priority=i % 10,
+                       due=base + datetime.timedelta(hours=i), status="NEEDS-ACTION",
+                       description=f"Description of task {i}", percent_complete=0,
+                       last_modified="2024-01-01T09:00:00")
+            for i in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    toggles = 20
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "tasks.json")
+        save_local_tasks(make_tasks(count), path)
+        print(f"{count} tasks, {toggles} status toggles")
+        for backend in ("json", "journal", "sqlite"):
+            start = time.perf_counter()
+            store = open_task_store(path, {"local_store": backend})
+            opened = time.perf_counter() - start
+            start = time.perf_counter()
+            for i in range(toggles):
+                store.update(f"uid-{i * 7:06d}", None,
+                             {"status": "COMPLETED", "percent_complete": 100})
+            toggle = (time.perf_counter() - start) / toggles
+            start = time.perf_counter()
+            store.load()
+            load = time.perf_counter() - start
+            start = time.perf_counter()
+            store.load()
+            reload = time.perf_counter() - start
+            print(f"{backend:7s} open {opened * 1000:6.1f} ms  toggle {toggle * 1000:7.2f} ms  "
+                  f"load {load * 1000:6.1f} ms  reload {reload * 1000:6.1f} ms")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark: finding the next due time of long-expired recurring tasks by
+stepping one interval at a time (the old loop) and with the closed-form
+RecurrenceRule engine.
+
+Usage: python benchmarks/bench_rrule.py [count]
+"""
+
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nextcloudtasks import next_occurrence, parse_rrule_to_minutes  # noqa: E402
+
+RULES = ("FREQ=MINUTELY;INTERVAL=5", "FREQ=HOURLY", "FREQ=DAILY;INTERVAL=2", "FREQ=WEEKLY")
+
+
+def stepped(rrule_str, due, now):
+    interval = datetime.timedelta(minutes=parse_rrule_to_minutes(rrule_str))
+    while due <= now:
+        due += interval
+    return due
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    now = datetime.datetime(2025, 6, 1, 12)
+    due = now - datetime.timedelta(days=365)
+    print(f"{count} tasks, due one year ago")
+    for rule in RULES:
+        assert stepped(rule, due, now) == next_occurrence(rule, due, now)
+        loop = timed(lambda: [stepped(rule, due, now) for _ in range(count)])
+        closed = timed(lambda: [next_occurrence(rule, due, now) for _ in range(count)])
+        print(f"{rule:26} loop {loop * 1000:9.1f} ms   closed form {closed * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
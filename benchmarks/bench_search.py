@@ -0,0 +1,65 @@
+"""
+Benchmark: TaskSearchIndex build time and per-query time against a plain
+substring scan over every task.
+
+Usage: python benchmarks/bench_search.py [count]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from task_record import TaskRecord  # noqa: E402
+from task_search import TaskSearchIndex, search_text  # noqa: E402
+
+WORDS = ("buy milk report review deploy call mom fix bug write docs plan trip "
+         "gym pay rent email boss invoice dentist").split()
+QUERIES = ("r", "re", "rev", "review", "review bug", "#4242", "milk #12", "dentist invoice")
+
+
+def make_tasks(count):
+    rnd = random.Random(1)
+    return [TaskRecord(summary=" ".join(rnd.sample(WORDS, 3)) + f" #{i}", uid=f"uid-{i}",
+                       description=" ".join(rnd.sample(WORDS, 6)))
+            for i in range(count)]
+
+
+def best(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    tasks = make_tasks(count)
+    index = TaskSearchIndex()
+    start = time.perf_counter()
+    for task in tasks:
+        index.set(task.uid, task)
+    print(f"{count} tasks, index built in {time.perf_counter() - start:.2f} s")
+
+    texts = {task.uid: search_text(task) for task in tasks}
+
+    def scan(query):
+        words = query.casefold().split()
+        return {key for key, text in texts.items() if all(w in text for w in words)}
+
+    def search(query):
+        index._last = ((), None)  # 每次都从头查询，不利用上一次的结果
+        return index.search(query)
+
+    for query in QUERIES:
+        assert search(query) == scan(query)
+        print(f"{query!r:18} {len(scan(query)):6} hits   index {best(lambda: search(query)) * 1000:6.1f} ms"
+              f"   scan {best(lambda: scan(query)) * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: cold load, save and file size of the JSON and binary snapshot
+formats.
+
+Usage: python benchmarks/bench_snapshot.py [count]
+"""
+
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_tasks import load_local_tasks, save_local_tasks  # noqa: E402
+from task_record import TaskRecord  # noqa: E402
+
+
+def make_tasks(count):
+    base = datetime.datetime(2024, 1, 1, 9)
+    return [TaskRecord(summary=f"Task {i}", uid=f"8c4e-4f1e-9d7e-{i:012d}",
+                       priority=str(i % 10), due=base + datetime.timedelta(hours=i),
+                       status="NEEDS-ACTION", description=f"Description of task {i}",
+                       percent_complete=0, rrule="FREQ=WEEKLY;INTERVAL=1" if i % 5 == 0 else None,
+                       last_modified="2024-01-01T09:00:00")
+            for i in range(count)]
+
+
+def best(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tasks = make_tasks(count)
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"{count} tasks")
+        for name in ("tasks.json", "tasks.bin"):
+            path = os.path.join(workdir, name)
+            save = best(lambda: save_local_tasks(tasks, path))
+            load = best(lambda: load_local_tasks(path))
+            assert [t.to_dict() for t in load_local_tasks(path)] == [t.to_dict() for t in tasks]
+            print(f"{name:10s} save {save * 1000:7.1f} ms   load {load * 1000:7.1f} ms   "
+                  f"size {os.path.getsize(path) / 1024:7.0f} KiB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
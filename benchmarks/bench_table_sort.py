@@ -0,0 +1,56 @@
+"""
+Benchmark: re-sorting the task table by one and by two columns, with
+QSortFilterProxyModel (one data() call per comparison) and with
+TaskProxyModel (sorted() over precomputed sort keys).
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_table_sort.py [count]
+"""
+
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PyQt5 import QtCore, QtWidgets  # noqa: E402
+from TaskTableModel import TaskTableModel, TaskProxyModel, SORT_ROLE  # noqa: E402
+from task_record import TaskRecord  # noqa: E402
+from translations import TRANSLATIONS  # noqa: E402
+
+
+def make_tasks(count):
+    base = datetime.datetime(2024, 1, 1, 9)
+    return [TaskRecord(summary=f"Task {(i * 7919) % count}", uid=f"uid-{i}",
+                       priority=str(i % 10), due=base + datetime.timedelta(hours=(i * 31) % count),
+                       status="COMPLETED" if i % 4 == 0 else "NEEDS-ACTION")
+            for i in range(count)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = QtWidgets.QApplication(sys.argv)  # noqa: F841
+    model = TaskTableModel(TRANSLATIONS["en"], "en", lambda task: task.due)
+    model.setTasks(make_tasks(count))
+
+    qsfpm = QtCore.QSortFilterProxyModel()
+    qsfpm.setSourceModel(model)
+    qsfpm.setSortRole(SORT_ROLE)
+    proxy = TaskProxyModel()
+    proxy.setSourceModel(model)
+
+    print(f"{count} tasks")
+    print(f"QSortFilterProxyModel  due       {timed(lambda: qsfpm.sort(3)) * 1000:8.1f} ms")
+    print(f"TaskProxyModel         due       {timed(lambda: proxy.sort(3)) * 1000:8.1f} ms")
+    two = [(0, QtCore.Qt.AscendingOrder), (3, QtCore.Qt.DescendingOrder)]
+    print(f"TaskProxyModel         done+due  {timed(lambda: proxy.setSortColumns(two)) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
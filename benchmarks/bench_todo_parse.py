@@ -0,0 +1,135 @@
+"""
+Microbenchmark: lazy single-pass Todo vs. the previous regex cascade.
+
+Reports construction time, construction + to_dict() time (what fetch_tasks
+does) and the memory held by the parsed list before and after to_dict().
+
+Usage: python benchmarks/bench_todo_parse.py [count]
+"""
+
+import datetime
+import os
+import re
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nextcloudtasks import Todo, ical_unescape  # noqa: E402
+
+
+class RegexTodo:
+    """The regex-based parser Todo used before, kept for comparison."""
+
+    def __init__(self, todo):
+        self.todo = todo
+        self.summary = ical_unescape(re.search('SUMMARY:(.*?)\n', todo, re.DOTALL).group(1))
+        self.created = datetime.datetime.strptime(
+            re.search('CREATED(?:;X-VOBJ-FLOATINGTIME-ALLOWED=TRUE|):(.*?)(?:Z)?\n',
+                      todo, re.DOTALL).group(1), '%Y%m%dT%H%M%S')
+        self.dtstamp = datetime.datetime.strptime(
+            re.search('DTSTAMP(?:;X-VOBJ-FLOATINGTIME-ALLOWED=TRUE|):(.*?)(?:Z)?\n',
+                      todo, re.DOTALL).group(1), '%Y%m%dT%H%M%S')
+        self.last_modified = datetime.datetime.strptime(
+            re.search('LAST-MODIFIED(?:;X-VOBJ-FLOATINGTIME-ALLOWED=TRUE|):(.*?)(?:Z)?\n',
+                      todo, re.DOTALL).group(1), '%Y%m%dT%H%M%S')
+        self.uid = re.search('UID:(.*?)\n', todo, re.DOTALL).group(1)
+        try:
+            self.due = datetime.datetime.strptime(
+                re.search('DUE:(.*?)(?:Z)?\n', todo, re.DOTALL).group(1), '%Y%m%dT%H%M%S')
+        except Exception:
+            self.due = None
+        try:
+            self.priority = re.search('PRIORITY:(.*?)\n', todo, re.DOTALL).group(1)
+        except Exception:
+            self.priority = None
+        try:
+            self.percent_complete = int(
+                re.search('PERCENT-COMPLETE:(.*?)\n', todo, re.DOTALL).group(1))
+        except Exception:
+            self.percent_complete = None
+        try:
+            self.status = re.search('STATUS:(.*?)\n', todo, re.DOTALL).group(1)
+        except Exception:
+            self.status = None
+        try:
+            self.completed = datetime.datetime.strptime(
+                re.search('COMPLETED:(.*?)\n', todo, re.DOTALL).group(1), '%Y%m%dT%H%M%S')
+        except Exception:
+            self.completed = None
+        try:
+            self.dtstart = datetime.datetime.strptime(
+                re.search('DTSTART:(.*?)\n', todo, re.DOTALL).group(1), '%Y%m%dT%H%M%S')
+        except Exception:
+            self.dtstart = None
+        try:
+            self.description = ical_unescape(re.search(
+                'DESCRIPTION:(.*?)\n', todo, re.DOTALL).group(1))
+        except Exception:
+            self.description = None
+        try:
+            self.related_to = re.search('RELATED-TO:(.*?)\n', todo, re.DOTALL).group(1)
+        except Exception:
+            self.related_to = None
+        try:
+            vtodo_match = re.search(r'BEGIN:VTODO(.*?)END:VTODO', todo, re.DOTALL)
+            if vtodo_match:
+                rrule_match = re.search(r'RRULE:(.*?)\n', vtodo_match.group(1), re.DOTALL)
+                self.rrule = rrule_match.group(1) if rrule_match else None
+            else:
+                self.rrule = None
+        except Exception:
+            self.rrule = None
+
+    def to_dict(self):
+        return Todo.to_dict(self)
+
+
+SAMPLE = """BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Nextcloud Tasks v0.16.1
+BEGIN:VTODO
+UID:{i:08d}-8c4e-4f1e-9d7e-2b9f1f0c6a11
+CREATED:20240101T090000
+LAST-MODIFIED:20240102T101500
+DTSTAMP:20240102T101500
+SUMMARY:Task number {i}\\, with an escaped comma
+DESCRIPTION:Some notes for task {i}.\\nSecond line of the description.
+PRIORITY:{p}
+STATUS:NEEDS-ACTION
+PERCENT-COMPLETE:0
+DUE:20240315T180000
+RRULE:FREQ=WEEKLY;INTERVAL=1
+CATEGORIES:work
+END:VTODO
+END:VCALENDAR
+"""
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    texts = [SAMPLE.format(i=i, p=i % 10) for i in range(count)]
+
+    for text in texts[:50]:
+        assert Todo(text).to_dict() == RegexTodo(text).to_dict()
+
+    print(f"{count} todos")
+    for name, cls in (("regex cascade", RegexTodo), ("lazy slotted", Todo)):
+        parse = min(timeit.repeat(lambda: [cls(t) for t in texts], number=1, repeat=5))
+        convert = min(timeit.repeat(lambda: [cls(t).to_dict() for t in texts],
+                                    number=1, repeat=5))
+        tracemalloc.start()
+        todos = [cls(t) for t in texts]
+        parsed = tracemalloc.get_traced_memory()[0]
+        for todo in todos:
+            todo.to_dict()
+        converted = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del todos
+        print(f"{name:14s} parse {parse * 1000:6.1f} ms  parse+to_dict {convert * 1000:6.1f} ms  "
+              f"held {parsed / 1024:5.0f} KiB / {converted / 1024:5.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cross-check: next occurrences from the RecurrenceRule engine against
+python-dateutil for random RRULEs. Rules the engine rejects (BYSETPOS,
+BYHOUR, ...) must give None from next_occurrence(), so the task is left
+alone instead of being moved to a wrong date.
+
+Usage: python benchmarks/check_rrule.py [rules] [seed]
+Needs python-dateutil (pip install python-dateutil).
+"""
+
+import datetime
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from nextcloudtasks import RecurrenceRule, next_occurrence  # noqa: E402
+
+try:
+    from dateutil.rrule import rrulestr
+except ImportError:
+    sys.exit("python-dateutil is needed for this check")
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+# 引擎不支持的部分，出现时必须拒绝整条规则
+UNSUPPORTED = ("BYSETPOS=-1", "BYHOUR=9,17", "BYMINUTE=30", "BYSECOND=15",
+               "BYWEEKNO=20", "BYYEARDAY=100", "WKST=SU")
+
+
+def random_rule(rnd):
+    freq = rnd.choice(("DAILY", "WEEKLY", "MONTHLY", "YEARLY"))
+    parts = [f"FREQ={freq}"]
+    if rnd.random() < .4:
+        parts.append(f"INTERVAL={rnd.randint(1, 4)}")
+    if rnd.random() < .5:
+        days = rnd.sample(WEEKDAYS, rnd.randint(1, 3))
+        if freq in ("MONTHLY", "YEARLY") and rnd.random() < .5:
+            days = [f"{rnd.choice((1, 2, 3, -1, -2))}{d}" for d in days]
+        parts.append("BYDAY=" + ",".join(days))
+    if freq != "WEEKLY" and rnd.random() < .4:
+        days = (rnd.choice((1, 5, 13, 28, 29, 30, 31, -1, -2)) for _ in range(rnd.randint(1, 2)))
+        parts.append("BYMONTHDAY=" + ",".join(map(str, days)))
+    if rnd.random() < .3:
+        parts.append("BYMONTH=" + ",".join(str(rnd.randint(1, 12)) for _ in range(rnd.randint(1, 2))))
+    if rnd.random() < .1:
+        parts.append(rnd.choice(UNSUPPORTED))
+    return ";".join(parts)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rnd = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 11)
+    checked = rejected = bad = 0
+    for _ in range(count):
+        rule = random_rule(rnd)
+        start = datetime.datetime(2029, 1, 1, 9) + datetime.timedelta(
+            days=rnd.randint(0, 800), minutes=rnd.randint(0, 1440))
+        try:
+            RecurrenceRule.parse(rule)
+        except ValueError:
+            rejected += 1
+            if any(part in rule for part in UNSUPPORTED):
+                assert next_occurrence(rule, start, start) is None, rule
+                continue
+            print(f"rejected supported rule {rule}")
+            bad += 1
+            continue
+        for _ in range(5):
+            after = start + datetime.timedelta(minutes=rnd.randint(-1000, 3 * 525600))
+            expected = rrulestr(rule, dtstart=start).after(after)
+            got = RecurrenceRule.parse(rule).next_after(start, after)
+            checked += 1
+            if got != expected:
+                bad += 1
+                print(f"{rule}  start {start}  after {after}: dateutil {expected}, engine {got}")
+    print(f"{checked} cases checked, {rejected} rules rejected, {bad} mismatches")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# ---------------------------
+# 紧凑的二进制任务快照：列式布局，截止时间保存为整数秒
+# ---------------------------
+
+
+import array
+import datetime
+import json
+import os
+import struct
+import sys
+from task_record import TaskRecord
+
+MAGIC = b"NCTB"
+VERSION = 1
+# magic, version, 任务数, 文本字节数
+HEADER = struct.Struct("<4sHII")
+
+# 文本列，按列依次拼接成一个 UTF-8 字符串
+TEXT_COLUMNS = ("summary", "uid", "status", "description", "rrule", "last_modified")
+# 截止时间以 1970-01-01 起的秒数保存（与界面一致，不带时区）
+EPOCH = datetime.datetime(1970, 1, 1)
+NONE = -(2 ** 63)
+
+
+def binary_path(path_tasks):
+    """tasks.json -> tasks.bin"""
+    return os.path.splitext(path_tasks)[0] + ".bin"
+
+
+def _little_endian(arr):
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def _encode_priority(priority):
+    # 优先级可能是整数（对话框）或字符串（服务器），分别标记
+    if priority is None:
+        return 0, NONE, None
+    if isinstance(priority, int) and not isinstance(priority, bool):
+        return 1, priority, None
+    return 2, NONE, str(priority)
+
+
+def save_binary_tasks(tasks, path):
+    """
+    Write tasks in the compact snapshot layout:
+
+        header   MAGIC, version, task count, text size
+        lengths  int32 per text value (len + 1, 0 = None), column-major
+        numbers  int64 per task: due seconds, percent_complete, priority
+        kinds    int8 per task: priority type (0 None, 1 int, 2 text)
+        text     all text values concatenated, UTF-8
+
+    Unknown tasks.json keys (extra) are stored as one JSON text column.
+    The file is written to a temporary name and renamed into place.
+    """
+    count = len(tasks)
+    columns = [[getattr(t, name) for t in tasks] for name in TEXT_COLUMNS]
+    kinds = array.array("b")
+    numbers = array.array("q")
+    priority_text = []
+    extra_text = []
+    for task in tasks:
+        due = task.due
+        numbers.append(NONE if due is None else
+                       (due - EPOCH) // datetime.timedelta(seconds=1))
+        percent = task.percent_complete
+        numbers.append(NONE if percent is None else int(percent))
+        kind, value, text = _encode_priority(task.priority)
+        kinds.append(kind)
+        numbers.append(value)
+        priority_text.append(text)
+        extra_text.append(json.dumps(task.extra, ensure_ascii=False) if task.extra else None)
+    columns.append(priority_text)
+    columns.append(extra_text)
+
+    lengths = array.array("i")
+    parts = []
+    for column in columns:
+        for value in column:
+            if value is None:
+                lengths.append(0)
+            else:
+                if not isinstance(value, str):
+                    value = str(value)
+                lengths.append(len(value) + 1)
+                parts.append(value)
+    text = "".join(parts).encode("utf-8")
+
+    path_tmp = path + ".tmp"
+    with open(path_tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, count, len(text)))
+        f.write(_little_endian(lengths).tobytes())
+        f.write(_little_endian(numbers).tobytes())
+        f.write(kinds.tobytes())
+        f.write(text)
+    os.replace(path_tmp, path)
+
+
+def _split(text, pos, lengths, start, count):
+    """Cut one column's values out of text, starting at character pos."""
+    values = []
+    append = values.append
+    for n in lengths[start:start + count]:
+        if n:
+            end = pos + n - 1
+            append(text[pos:end])
+            pos = end
+        else:
+            append(None)
+    return values, pos
+
+
+def load_binary_tasks(path):
+    """Read a snapshot written by save_binary_tasks. Missing file -> []."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    magic, version, count, text_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("{} is not a task snapshot".format(path))
+    offset = HEADER.size
+    ncolumns = len(TEXT_COLUMNS) + 2
+    lengths = array.array("i")
+    lengths.frombytes(data[offset:offset + 4 * ncolumns * count])
+    offset += 4 * ncolumns * count
+    numbers = array.array("q")
+    numbers.frombytes(data[offset:offset + 8 * 3 * count])
+    offset += 8 * 3 * count
+    kinds = array.array("b")
+    kinds.frombytes(data[offset:offset + count])
+    offset += count
+    _little_endian(lengths)
+    _little_endian(numbers)
+    text = data[offset:offset + text_size].decode("utf-8")
+
+    columns = []
+    pos = 0
+    for c in range(ncolumns):
+        values, pos = _split(text, pos, lengths, c * count, count)
+        columns.append(values)
+    priority_text, extra_text = columns[-2], columns[-1]
+
+    tasks = []
+    new = TaskRecord.__new__
+    seconds = datetime.timedelta(seconds=1)
+    for i, (summary, uid, status, description, rrule, last_modified) in enumerate(zip(*columns[:-2])):
+        task = new(TaskRecord)
+        task.summary = summary
+        task.uid = uid
+        task.status = status
+        task.description = description
+        task.rrule = rrule
+        task.last_modified = last_modified
+        due = numbers[3 * i]
+        task.due = None if due == NONE else EPOCH + due * seconds
+        percent = numbers[3 * i + 1]
+        task.percent_complete = None if percent == NONE else percent
+        kind = kinds[i]
+        task.priority = numbers[3 * i + 2] if kind == 1 else priority_text[i]
+        extra = extra_text[i]
+        task.extra = json.loads(extra) if extra else None
+        tasks.append(task)
+    return tasks
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless command line and sync daemon, without Qt.
+
+    python cli.py [-c conf.json] sync
+    python cli.py list [--all] [--json]
+    python cli.py add "Buy milk" [--due 2025-06-01T18:00] [--priority 5] [--note TEXT] [--rrule FREQ=WEEKLY]
+    python cli.py done <uid or summary>
+    python cli.py export <path.json>
+    python cli.py daemon [--interval SECONDS]
+
+list and export only read the local store and never import the CalDAV
+stack. The other commands go through TaskHandler like the window does,
+so changes that cannot reach the server wait in the outbox.
+"""
+
+
+import argparse
+import datetime
+import json
+import sys
+import time
+from local_tasks import open_task_store, export_local_tasks
+from task_record import DUE_FORMAT
+
+# ---------------------------
+# 配置与连接
+# ---------------------------
+
+
+def load_config(path_conf):
+    with open(path_conf, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config.setdefault("offline_mode", False)
+    return config
+
+
+def open_handler(config):
+    """TaskHandler for config, logged in unless offline_mode is set."""
+    # 只有需要访问服务器的命令才导入 caldav/urllib3，list 与 export 保持快速启动
+    import urllib3
+    from nextcloudtasks import NextcloudTask
+    from TaskHandler import TaskHandler
+    if not config.get("ssl_verify_cert", True):
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    handler = TaskHandler(config, config["tasks_json_path"], NextcloudTask(config=config))
+    connect(handler, config)
+    return handler
+
+
+def connect(handler, config):
+    """Log in if needed; returns False if the server cannot be used."""
+    if config["offline_mode"]:
+        return True
+    if not handler.nc_client.connected:
+        try:
+            # 不在登录时下载任务列表，由具体命令决定需要什么
+            handler.nc_client.connect(config["username"], config["password"], load=False)
+        except Exception as e:
+            print(f"cannot connect to server: {e}", file=sys.stderr)
+            return False
+    return True
+
+
+def parse_due_arg(value):
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date/time: {value!r} (use YYYY-MM-DDTHH:MM)")
+
+
+def format_task(task):
+    done = "x" if task.status == "COMPLETED" else " "
+    due = task.due.strftime("%Y-%m-%d %H:%M") if task.due else " " * 16
+    priority = task.priority if task.priority is not None else "-"
+    repeat = f"  [{task.rrule}]" if task.rrule else ""
+    return f"[{done}] {due}  P{priority}  {task.summary}{repeat}  ({task.uid or 'local'})"
+
+
+# ---------------------------
+# 命令
+# ---------------------------
+
+
+def cmd_list(args, config):
+    tasks = open_task_store(config["tasks_json_path"], config).load()
+    if not args.all:
+        tasks = [t for t in tasks if t.status != "COMPLETED"]
+    # 有截止时间的在前，按时间排序
+    tasks.sort(key=lambda t: (t.due is None, t.due or datetime.datetime.min, t.summary or ""))
+    if args.json:
+        print(json.dumps([t.to_dict() for t in tasks], ensure_ascii=False, indent=2))
+    else:
+        for task in tasks:
+            print(format_task(task))
+    return 0
+
+
+def cmd_export(args, config):
+    tasks = open_task_store(config["tasks_json_path"], config).load()
+    try:
+        export_local_tasks(tasks, args.path)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"exported {len(tasks)} tasks to {args.path}")
+    return 0
+
+
+def cmd_sync(args, config):
+    handler = open_handler(config)
+    if config["offline_mode"]:
+        tasks = handler.fetch_tasks()
+    elif not handler.nc_client.connected:
+        return 1
+    else:
+        try:
+            tasks = handler.download_tasks()
+        except Exception as e:
+            print(f"sync failed: {e}", file=sys.stderr)
+            return 1
+    rolled = handler.roll_forward_recurring()
+    print(f"{len(tasks)} tasks, {rolled} recurring moved forward, "
+          f"{len(handler.outbox)} changes waiting to be sent")
+    # 仍有未发送的修改时返回非零，便于定时任务发现问题
+    return 1 if len(handler.outbox) else 0
+
+
+def cmd_add(args, config):
+    handler = open_handler(config)
+    uid = handler.add_task({
+        "summary": args.summary,
+        "description": args.note or "",
+        "priority": args.priority,
+        "due": args.due,
+        "rrule": args.rrule,
+    })
+    print(uid or args.summary)
+    return 0
+
+
+def cmd_done(args, config):
+    handler = open_handler(config)
+    tasks = handler.store.load()
+    matches = [t for t in tasks if t.uid == args.task]
+    if not matches:
+        matches = [t for t in tasks if t.summary == args.task]
+    if not matches:
+        print(f"no task with uid or summary {args.task!r}", file=sys.stderr)
+        return 1
+    if len(matches) > 1:
+        print(f"{len(matches)} tasks are named {args.task!r}, use the uid:", file=sys.stderr)
+        for task in matches:
+            print("  " + format_task(task), file=sys.stderr)
+        return 1
+    task = matches[0]
+    handler.update_statuses([(task.uid, task.summary, "COMPLETED", 100)])
+    task.status = "COMPLETED"
+    print(format_task(task))
+    return 0
+
+
+def cmd_daemon(args, config):
+    interval = args.interval or int(config.get("check_interval", 600))
+    handler = open_handler(config)
+    print(f"syncing every {interval} s, Ctrl+C to stop")
+    try:
+        while True:
+            try:
+                tasks = None
+                if not config["offline_mode"] and connect(handler, config) and handler.server_changed():
+                    # 服务器无变化时只有一次 PROPFIND
+                    tasks = handler.download_tasks()
+            except Exception as e:
+                print(f"{datetime.datetime.now().strftime(DUE_FORMAT)} sync failed: {e}", file=sys.stderr)
+            rolled = handler.roll_forward_recurring()
+            if tasks is not None or rolled:
+                print(f"{datetime.datetime.now().strftime(DUE_FORMAT)} "
+                      f"{len(tasks) if tasks is not None else 'unchanged'} tasks, "
+                      f"{rolled} recurring moved forward, {len(handler.outbox)} queued")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nextcloud tasks without the GUI")
+    parser.add_argument("-c", "--config", default="conf.json", help="config file (default: conf.json)")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    p = commands.add_parser("sync", help="send queued changes and download the task list")
+    p.set_defaults(func=cmd_sync)
+
+    p = commands.add_parser("list", help="show the local tasks (open ones by default)")
+    p.add_argument("--all", action="store_true", help="include completed tasks")
+    p.add_argument("--json", action="store_true", help="print tasks.json-style JSON")
+    p.set_defaults(func=cmd_list)
+
+    p = commands.add_parser("add", help="create a task")
+    p.add_argument("summary")
+    p.add_argument("--due", type=parse_due_arg, help="YYYY-MM-DDTHH:MM")
+    p.add_argument("--priority", type=int, choices=range(10), default=0, metavar="0-9")
+    p.add_argument("--note", help="task detail")
+    p.add_argument("--rrule", help="e.g. FREQ=WEEKLY;INTERVAL=2")
+    p.set_defaults(func=cmd_add)
+
+    p = commands.add_parser("done", help="mark a task completed")
+    p.add_argument("task", help="uid, or summary if it is unique")
+    p.set_defaults(func=cmd_done)
+
+    p = commands.add_parser("export", help="write the local tasks as JSON")
+    p.add_argument("path")
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser("daemon", help="keep syncing in the foreground")
+    p.add_argument("--interval", type=int, help="seconds between checks (default: check_interval)")
+    p.set_defaults(func=cmd_daemon)
+
+    args = parser.parse_args(argv)
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        print(f"cannot load config {args.config}: {e}", file=sys.stderr)
+        return 1
+    return args.func(args, config)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
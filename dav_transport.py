@@ -0,0 +1,70 @@
+import asyncio
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DAVTransport:
+    """
+    asyncio 传输层：在 caldav.DAVClient 的 HTTP 会话之上并发执行请求。
+
+    caldav 本身是同步库，这里把每个请求交给一个大小为 max_connections 的
+    线程池执行，并在会话的连接池较小时扩大到同样的大小，使并发请求复用
+    keep-alive 连接而不是每次重新握手。协程接口便于把同一任务的
+    GET→修改→PUT 串成一条流水线，同时让多条流水线并发执行。
+    """
+
+    def __init__(self, client, max_connections=8):
+        self.client = client
+        self.max_connections = max(1, int(max_connections))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_connections,
+                                            thread_name_prefix="dav")
+        self._configure_pool()
+
+    def _configure_pool(self):
+        """Enlarge the session's connection pools to max_connections, keeping the adapters' settings."""
+        session = getattr(self.client, "session", None)
+        if session is None:
+            return
+        try:
+            for prefix in ("https://", "http://"):
+                adapter = session.get_adapter(prefix)
+                # 只扩大不缩小；直接修改已有适配器，保留会话的解析器、keep-alive 等设置
+                if adapter._pool_maxsize >= self.max_connections:
+                    continue
+                adapter._pool_maxsize = self.max_connections
+                adapter.poolmanager.connection_pool_kw["maxsize"] = self.max_connections
+                # 已创建的主机连接池仍是旧的大小，清除后按新大小重建
+                adapter.poolmanager.clear()
+        except Exception as e:
+            # 无法调整连接池时仍可工作，只是连接复用受限
+            print(f"[DEBUG] DAVTransport: keeping default connection pool: {e}", file=sys.stderr)
+
+    async def request(self, method, url, body="", headers=None):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.client.request, str(url), method, body, headers or {})
+        return await loop.run_in_executor(self._executor, call)
+
+    async def gather(self, coroutines, limit=None):
+        if limit:
+            semaphore = asyncio.Semaphore(max(1, int(limit)))
+
+            async def bounded(coroutine):
+                async with semaphore:
+                    return await coroutine
+            coroutines = [bounded(c) for c in coroutines]
+        return await asyncio.gather(*coroutines, return_exceptions=True)
+
+    def run(self, coroutines, limit=None):
+        """
+        Run coroutines concurrently and return their results in order.
+        At most limit coroutines run at once (default: one per connection).
+        Failures are returned as exception objects instead of raised.
+        """
+        coroutines = list(coroutines)
+        if not coroutines:
+            return []
+        return asyncio.run(self.gather(coroutines, limit))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
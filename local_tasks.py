@@ -1,13 +1,20 @@
 import os
+import sys
 import json
-import datetime
+import threading
+import time
+from binary_tasks import binary_path, load_binary_tasks, save_binary_tasks
+from task_record import TaskRecord, DUE_FORMAT
 
 
 def load_local_tasks(path_tasks):
     """
-    从 tasks.json 中加载任务列表，每个任务为一个字典。
-    如果存在截止时间字段，将其从字符串转换为 datetime 对象。
+    从 tasks.json 中加载任务列表，每个任务为一个 TaskRecord。
+    截止时间字段在这里一次性从字符串转换为 datetime 对象。
+    .bin 文件按二进制快照格式读取。
     """
+    if path_tasks.endswith(".bin"):
+        return load_binary_tasks(path_tasks)
     if os.path.exists(path_tasks):
         with open(path_tasks, "r", encoding="utf-8") as f:
             try:
@@ -16,26 +23,420 @@ def load_local_tasks(path_tasks):
                 tasks = []
     else:
         tasks = []
-    for task in tasks:
-        if task.get("due"):
-            try:
-                task["due"] = datetime.datetime.strptime(
-                    task["due"], "%Y-%m-%dT%H:%M:%S")
-            except Exception:
-                task["due"] = None
-    return tasks
+    return [TaskRecord.from_dict(task) for task in tasks]
 
 
 def save_local_tasks(tasks, path_tasks):
     """
-    将任务列表保存到 tasks.json 中。
-    如果任务中包含 datetime 类型的截止时间，则转换为字符串保存。
+    将 TaskRecord 列表保存到 tasks.json 中，截止时间转换为字符串保存。
+    .bin 文件按二进制快照格式写入。
     """
-    tasks_to_save = []
-    for task in tasks:
-        new_task = task.copy()
-        if new_task.get("due") and isinstance(new_task["due"], datetime.datetime):
-            new_task["due"] = new_task["due"].strftime("%Y-%m-%dT%H:%M:%S")
-        tasks_to_save.append(new_task)
-    with open(path_tasks, "w", encoding="utf-8") as f:
+    if path_tasks.endswith(".bin"):
+        save_binary_tasks(tasks, path_tasks)
+        return
+    tasks_to_save = [task.to_dict() for task in tasks]
+    # 先写临时文件再原子替换，写入中途崩溃不会截断原文件
+    path_tmp = path_tasks + ".tmp"
+    with open(path_tmp, "w", encoding="utf-8") as f:
         json.dump(tasks_to_save, f, ensure_ascii=False, indent=4)
+    os.replace(path_tmp, path_tasks)
+
+
+def _file_stamp(*paths):
+    """(大小, 修改时间) 元组，用于判断文件是否被其他程序修改"""
+    stamp = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((st.st_size, st.st_mtime_ns))
+    return tuple(stamp)
+
+
+class JsonTaskStore:
+    """
+    默认的本地存储：整个任务列表保存在 tasks.json 中。
+
+    解析后的任务列表缓存在内存中，并记录文件的大小与修改时间；
+    文件未被其他程序修改时 load() 不再读取和解析 JSON。
+    写入时同时更新缓存（write-through），不需要重新读取。
+    """
+
+    def __init__(self, path_tasks):
+        self.path = path_tasks
+        self._cache = None
+        self._stamp = None
+
+    def _tasks(self):
+        """The cached task list, re-read only if tasks.json changed on disk."""
+        stamp = _file_stamp(self.path)
+        if self._cache is None or stamp != self._stamp:
+            self._cache = load_local_tasks(self.path)
+            self._stamp = stamp
+        return self._cache
+
+    def _write(self, tasks):
+        try:
+            save_local_tasks(tasks, self.path)
+        except Exception:
+            self._cache = None
+            raise
+        self._cache = tasks
+        self._stamp = _file_stamp(self.path)
+
+    def load(self):
+        # 返回副本，调用方修改任务不会影响缓存
+        return [task.copy() for task in self._tasks()]
+
+    def save(self, tasks):
+        self._write([task.copy() for task in tasks])
+
+    def add(self, task):
+        self._write(self._tasks() + [task.copy()])
+
+    def update(self, uid, summary, fields):
+        """
+        Apply fields to the first task with this uid (or, without a uid,
+        this summary). Does nothing if there is no such task.
+        """
+        tasks = [task.copy() for task in self._tasks()]
+        if apply_update(tasks, uid, summary, fields):
+            self._write(tasks)
+
+    def update_many(self, updates):
+        """Apply several (uid, summary, fields) updates with a single write."""
+        tasks = [task.copy() for task in self._tasks()]
+        changed = [apply_update(tasks, uid, summary, fields) for uid, summary, fields in updates]
+        if any(changed):
+            self._write(tasks)
+
+    def delete(self, uid, summary):
+        """Delete every task with this uid (or, without a uid, this summary)."""
+        self._write([t for t in self._tasks() if not task_matches(t, uid, summary)])
+
+    def merge(self, tasks, removed_uids):
+        """
+        Replace or append tasks by uid and delete the tasks in removed_uids,
+        with a single write. Used to apply an incremental sync.
+        """
+        merged = list(self._tasks())
+        merge_tasks(merged, tasks, removed_uids)
+        self._write(merged)
+
+
+def task_matches(task, uid, summary):
+    if uid:
+        return task.uid == uid
+    return task.summary == summary
+
+
+def merge_tasks(tasks, changed, removed_uids):
+    """Replace or append the changed tasks by uid and drop removed_uids, in place."""
+    index = {t.uid: i for i, t in enumerate(tasks) if t.uid}
+    for task in changed:
+        if task.uid in index:
+            tasks[index[task.uid]] = task.copy()
+        else:
+            index[task.uid] = len(tasks)
+            tasks.append(task.copy())
+    if removed_uids:
+        tasks[:] = [t for t in tasks if t.uid not in removed_uids]
+
+
+def apply_update(tasks, uid, summary, fields):
+    for task in tasks:
+        if task_matches(task, uid, summary):
+            task.update(fields)
+            return True
+    return False
+
+
+def journal_path(path_tasks):
+    return path_tasks + ".journal"
+
+
+def _snapshot_id(path_tasks):
+    """用 tasks.json 的大小与修改时间标识日志所基于的快照"""
+    try:
+        st = os.stat(path_tasks)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _json_value(value):
+    return value.strftime(DUE_FORMAT) if hasattr(value, "strftime") else value
+
+
+class JournalTaskStore:
+    """
+    tasks.json snapshot plus an append-only journal (tasks.json.journal).
+
+    add/update/status/delete (and put, which replaces a task by uid) are
+    appended to the journal as one JSON line each, keyed by uid (or
+    summary for tasks without one). load() reads the
+    snapshot and replays the journal. After compact_entries journal lines,
+    or compact_seconds after the first uncompacted change, a background
+    thread writes a fresh snapshot via atomic rename and starts an empty
+    journal. Like JsonTaskStore, the replayed list is cached in memory
+    until the snapshot or the journal is changed by another process.
+
+    The journal's first line records which snapshot it belongs to. A
+    journal left over from an interrupted compaction no longer matches
+    the new snapshot and is ignored, so no change is applied twice. A
+    partially written last line is ignored as well.
+    """
+
+    def __init__(self, path_tasks, compact_entries=500, compact_seconds=300):
+        self.path = path_tasks
+        self.journal = journal_path(path_tasks)
+        self.compact_entries = compact_entries
+        self.compact_seconds = compact_seconds
+        self._lock = threading.RLock()
+        self._entries = None
+        self._timer = None
+        self._compacting = False
+        self._tail_checked = False
+        self._cache = None
+        self._stamp = None
+
+    def _read_journal(self):
+        """Journal entries that apply to the current snapshot."""
+        try:
+            with open(self.journal, "r", encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # 崩溃时写了一半的行，跳过
+                continue
+        if not entries or entries[0].get("snapshot") != _snapshot_id(self.path):
+            return []
+        return entries[1:]
+
+    def _cacheValid(self):
+        return self._cache is not None and self._stamp == _file_stamp(self.path, self.journal)
+
+    def load(self):
+        with self._lock:
+            if not self._cacheValid():
+                tasks = load_local_tasks(self.path)
+                entries = self._read_journal()
+                self._entries = len(entries)
+                for entry in entries:
+                    replay_entry(tasks, entry)
+                self._cache = tasks
+                self._stamp = _file_stamp(self.path, self.journal)
+            return [task.copy() for task in self._cache]
+
+    def save(self, tasks):
+        with self._lock:
+            self._write_snapshot(tasks)
+
+    def _write_snapshot(self, tasks):
+        self._cache = None
+        save_local_tasks(tasks, self.path)
+        # 在新日志替换旧日志之前崩溃时，旧日志也会因快照不匹配而被忽略
+        self._reset_journal()
+        self._cache = [task.copy() for task in tasks]
+        self._stamp = _file_stamp(self.path, self.journal)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _reset_journal(self):
+        """Start an empty journal for the current snapshot."""
+        path_tmp = self.journal + ".tmp"
+        with open(path_tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"snapshot": _snapshot_id(self.path)}) + "\n")
+        os.replace(path_tmp, self.journal)
+        self._entries = 0
+
+    def _append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, default=_json_value) + "\n"
+        with self._lock:
+            cache = self._cache if self._cacheValid() else None
+            self._cache = None
+            if self._entries is None:
+                self._entries = len(self._read_journal())
+            if not self._entries and not self._journal_valid():
+                # 还没有与当前快照匹配的日志，先写入头部
+                self._reset_journal()
+            if not self._tail_checked:
+                # 上次崩溃留下的半行没有换行符，新记录另起一行
+                line = self._tailSeparator() + line
+                self._tail_checked = True
+            with open(self.journal, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._entries += 1
+            if cache is not None:
+                # 把同一条记录应用到缓存上，下次 load() 无需重新读取
+                replay_entry(cache, json.loads(line))
+                self._cache = cache
+                self._stamp = _file_stamp(self.path, self.journal)
+            self._scheduleCompaction()
+
+    def _tailSeparator(self):
+        try:
+            with open(self.journal, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return ""
+                f.seek(-1, os.SEEK_END)
+                return "" if f.read(1) == b"\n" else "\n"
+        except OSError:
+            return ""
+
+    def _journal_valid(self):
+        try:
+            with open(self.journal, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            return False
+        return header.get("snapshot") == _snapshot_id(self.path)
+
+    def _scheduleCompaction(self):
+        if self._entries >= self.compact_entries:
+            self._startCompaction()
+        elif self._timer is None and self.compact_seconds:
+            self._timer = threading.Timer(self.compact_seconds, self._startCompaction)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _startCompaction(self):
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, name="journal-compact", daemon=True).start()
+
+    def compact(self):
+        """Fold the journal into tasks.json (atomic rename) and empty it."""
+        try:
+            with self._lock:
+                if self._entries or self._read_journal():
+                    self._write_snapshot(self.load())
+        except Exception as e:
+            print(f"[DEBUG] JournalTaskStore: compaction failed: {e}", file=sys.stderr)
+        finally:
+            self._compacting = False
+
+    def add(self, task):
+        self._append({"op": "add", "task": task.to_dict()})
+
+    def update(self, uid, summary, fields):
+        """
+        Apply fields to the first task with this uid (or, without a uid,
+        this summary). Does nothing if there is no such task.
+        """
+        op = "status" if set(fields) <= {"status", "percent_complete"} else "update"
+        self._append({"op": op, "uid": uid, "summary": summary, "fields": fields})
+
+    def update_many(self, updates):
+        # 每条修改只追加一行日志，逐条写入即可
+        for uid, summary, fields in updates:
+            self.update(uid, summary, fields)
+
+    def delete(self, uid, summary):
+        """Delete every task with this uid (or, without a uid, this summary)."""
+        self._append({"op": "delete", "uid": uid, "summary": summary})
+
+    def merge(self, tasks, removed_uids):
+        """Replace or append tasks by uid and delete removed_uids: one journal line each."""
+        for task in tasks:
+            self._append({"op": "put", "task": task.to_dict()})
+        for uid in removed_uids:
+            self.delete(uid, None)
+
+
+def replay_entry(tasks, entry):
+    """Apply one journal entry to a task list in place."""
+    op = entry.get("op")
+    if op == "add":
+        tasks.append(TaskRecord.from_dict(entry["task"]))
+    elif op in ("update", "status"):
+        apply_update(tasks, entry.get("uid"), entry.get("summary"), entry["fields"])
+    elif op == "put":
+        merge_tasks(tasks, [TaskRecord.from_dict(entry["task"])], ())
+    elif op == "delete":
+        tasks[:] = [t for t in tasks if not task_matches(t, entry.get("uid"), entry.get("summary"))]
+
+
+def export_local_tasks(tasks, path_json):
+    """Write tasks as human-readable JSON, whatever the snapshot format."""
+    if path_json.endswith(".bin"):
+        raise ValueError("export path must not be a .bin snapshot")
+    save_local_tasks(tasks, path_json)
+
+
+def snapshot_path(path_tasks, snapshot_format="json"):
+    """
+    Snapshot file for the "snapshot_format" config key: tasks.json itself,
+    or tasks.bin next to it for "binary". The first time the binary
+    snapshot is used, an existing tasks.json is converted into it.
+    """
+    if snapshot_format != "binary":
+        return path_tasks
+    path_bin = binary_path(path_tasks)
+    if not os.path.exists(path_bin) and os.path.exists(path_tasks):
+        tasks = load_local_tasks(path_tasks)
+        save_binary_tasks(tasks, path_bin)
+        print(f"[DEBUG] snapshot_path: converted {len(tasks)} tasks to {path_bin}", file=sys.stderr)
+    return path_bin
+
+
+def open_task_store(path_tasks, config=None):
+    """
+    Open the local task store selected by the "local_store" config key:
+    "json" (tasks.json, default), "journal" (tasks.json plus an append-only
+    journal) or "sqlite" (tasks.db next to it). The json and journal
+    stores keep their snapshot in the format chosen by "snapshot_format"
+    ("json" or "binary").
+    """
+    config = config or {}
+    backend = config.get("local_store", "json")
+    if backend == "sqlite":
+        from sqlite_tasks import SqliteTaskStore
+        return SqliteTaskStore(path_tasks)
+    path_tasks = snapshot_path(path_tasks, config.get("snapshot_format", "json"))
+    if backend == "journal":
+        return JournalTaskStore(path_tasks,
+                                compact_entries=int(config.get("journal_compact_entries", 500)),
+                                compact_seconds=float(config.get("journal_compact_seconds", 300)))
+    return JsonTaskStore(path_tasks)
+
+
+def sync_state_path(path_tasks):
+    """增量同步状态（sync-token 与 href→uid 映射）保存在 tasks.json 旁边"""
+    return path_tasks + ".sync"
+
+
+def load_sync_state(path_tasks):
+    """
+    读取增量同步状态，格式为 {"sync_token": str, "hrefs": {href: uid}}。
+    本地任务文件不存在或状态损坏时返回空状态，从而触发一次完整同步。
+    """
+    path_state = sync_state_path(path_tasks)
+    if not os.path.exists(path_tasks) or not os.path.exists(path_state):
+        return {}
+    try:
+        with open(path_state, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or not state.get("sync_token"):
+        return {}
+    return state
+
+
+def save_sync_state(state, path_tasks):
+    with open(sync_state_path(path_tasks), "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
@@ -11,10 +11,8 @@ def main():
     else:
         app = QtWidgets.QApplication.instance()
     window = MainWindow()
-    if not window.config['offline_mode']:
-        window.checkLocalServerTasks()
-    window.fetchTasks()
     window.show()
+    window.reconcileWithServer()
     sys.exit(app.exec_())
 
 
@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import array
 import caldav
+import calendar
 import datetime
+import functools
 import json
 import uuid
 import re
+import sys
 import urllib3
+from dav_transport import DAVTransport
+from urllib.parse import unquote, urlparse
+from xml.sax.saxutils import escape as xml_escape
 # urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
@@ -20,7 +27,7 @@ SUMMARY:{}
 UID:{}
 PRIORITY:{}
 PERCENT-COMPLETE:{}
-STATUS: {}
+STATUS:{}
 END:VTODO
 END:VCALENDAR"""
 
@@ -40,6 +47,188 @@ class ListNotFound(Exception):
     def __init__(self, list):
         super().__init__("List \"%s\" not found." % list)
 
+
+class SyncTokenExpired(Exception):
+    """服务器拒绝了旧的 sync-token，需要重新做一次完整同步"""
+    pass
+
+
+class SyncNotSupported(Exception):
+    """服务器不支持 RFC 6578 sync-collection REPORT"""
+    pass
+
+sync_collection_skeleton = """<?xml version="1.0" encoding="utf-8" ?>
+<d:sync-collection xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">
+  <d:sync-token>{}</d:sync-token>
+  <d:sync-level>1</d:sync-level>
+  <d:prop>
+    <d:getetag/>
+    <c:calendar-data/>
+  </d:prop>
+</d:sync-collection>"""
+
+calendar_multiget_skeleton = """<?xml version="1.0" encoding="utf-8" ?>
+<c:calendar-multiget xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">
+  <d:prop>
+    <d:getetag/>
+    <c:calendar-data/>
+  </d:prop>
+{}
+</c:calendar-multiget>"""
+
+todo_query_skeleton = """<?xml version="1.0" encoding="utf-8" ?>
+<c:calendar-query xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">
+  <d:prop>
+    <d:getetag/>
+    <c:calendar-data/>
+  </d:prop>
+  <c:filter>
+    <c:comp-filter name="VCALENDAR">
+      <c:comp-filter name="VTODO"/>
+    </c:comp-filter>
+  </c:filter>
+</c:calendar-query>"""
+
+calendar_tag_propfind = """<?xml version="1.0" encoding="utf-8" ?>
+<d:propfind xmlns:d="DAV:" xmlns:cs="http://calendarserver.org/ns/">
+  <d:prop>
+    <d:sync-token/>
+    <cs:getctag/>
+  </d:prop>
+</d:propfind>"""
+
+uid_line = re.compile(r'^UID:(.*?)\r?$', re.MULTILINE)
+done_line = re.compile(r'^(?:STATUS:(?:COMPLETED|CANCELLED)\r?$|COMPLETED[:;])', re.MULTILINE)
+
+DAV_NS = "{DAV:}"
+CALDAV_NS = "{urn:ietf:params:xml:ns:caldav}"
+CS_NS = "{http://calendarserver.org/ns/}"
+
+
+def ical_escape(text):
+    """Escape a TEXT property value (RFC 5545 3.3.11)."""
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def ical_unescape(text):
+    """Reverse ical_escape for TEXT property values."""
+    if text is None or "\\" not in text:
+        return text
+    return re.sub(r'\\([\\;,nN])',
+                  lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+def make_todo(summary, priority=0, percent_complete=0, rrule=None,
+              due=None, note=None, categories=None, start=None, uid=None):
+    """
+    Build a complete VCALENDAR/VTODO text. Returns (uid, ical_text).
+    A new UID is generated unless one is given.
+    """
+    if percent_complete == 100:
+        status = "COMPLETED"
+    elif percent_complete == 0:
+        status = "NEEDS-ACTION"
+    else:
+        status = "IN-PROCESS"
+    now = datetime.datetime.now().strftime('%Y%m%dT%H%M%S')
+    uid = uid or str(uuid.uuid4())
+    todo = todo_skeleton.format(
+        now, now, now,
+        ical_escape(summary), uid, str(
+            priority), str(percent_complete), status
+    )
+    extra = []
+    if start is not None:
+        extra.append("DTSTART:" + start.strftime('%Y%m%dT%H%M%S'))
+    if due is not None:
+        extra.append("DUE:" + due.strftime('%Y%m%dT%H%M%S'))
+    if note:
+        extra.append("DESCRIPTION:" + ical_escape(note))
+    if categories:
+        if isinstance(categories, str):
+            categories = [categories]
+        extra.append("CATEGORIES:" + ",".join(ical_escape(c) for c in categories))
+    if percent_complete == 100:
+        extra.append("COMPLETED:" + now)
+    if rrule:
+        extra.append("RRULE:" + rrule)
+    if extra:
+        todo = todo.replace("END:VTODO", "\n".join(extra) + "\nEND:VTODO")
+    return uid, todo
+
+
+# updateTodo 中表示“保持原值”的默认值，用于区分“未提供”与“删除”（None）
+UNSET = object()
+
+
+def apply_todo_changes(todo, summary=None, start=None, due=UNSET, note=None,
+                       priority=None, percent_complete=None, categories=None, rrule=None):
+    """
+    Apply updateTodo-style field changes to a caldav Todo object.
+    A due of None removes DUE (leaving it out keeps it); an rrule of ""
+    removes RRULE.
+    """
+    if summary is not None:
+        todo.icalendar_component['SUMMARY'] = summary
+    if note is not None:
+        todo.icalendar_component['DESCRIPTION'] = note
+    if categories is not None:
+        todo.icalendar_component['CATEGORIES'] = categories
+    if start is not None:
+        todo.icalendar_component['DTSTART'] = start.strftime(
+            '%Y%m%dT%H%M%S')
+    if due is UNSET:
+        pass
+    elif due is not None:
+        todo.icalendar_component['DUE'] = due.strftime('%Y%m%dT%H%M%S')
+    elif 'DUE' in todo.icalendar_component:
+        del todo.icalendar_component['DUE']
+    if priority is not None:
+        todo.icalendar_component['PRIORITY'] = priority
+    if percent_complete is not None:
+        todo.icalendar_component['PERCENT-COMPLETE'] = percent_complete
+        if percent_complete == 0:
+            todo.icalendar_component['STATUS'] = "NEEDS-ACTION"
+        elif percent_complete == 100:
+            todo.icalendar_component['STATUS'] = "COMPLETED"
+            todo.icalendar_component['COMPLETED'] = datetime.datetime.now().strftime(
+                '%Y%m%dT%H%M%S')
+        else:
+            todo.icalendar_component['STATUS'] = "IN-PROCESS"
+
+    if rrule == "": # Explicit delete if empty string passed
+        # 删除 VTODO 组件中的 RRULE
+        if 'RRULE' in todo.icalendar_component:
+            del todo.icalendar_component['RRULE']
+    elif rrule is not None:
+        from icalendar import vRecur
+        # Set or Update RRULE
+        # vRecur.from_ical returns a dict, we must wrap it in vRecur object for correct serialization
+        todo.icalendar_component['RRULE'] = vRecur(vRecur.from_ical(rrule))
+
+    todo.icalendar_component['LAST-MODIFIED'] = datetime.datetime.now().strftime(
+        '%Y%m%dT%H%M%S')
+    # 清除 _data 缓存，强制从 icalendar_instance 重新生成数据
+    # 这确保对 icalendar_component 的修改会被正确保存到服务器
+    todo._data = None
+
+
+def todo_is_pending(data):
+    """
+    True unless the task is completed or cancelled. Matches what
+    calendar.todos() returns, which leaves out finished tasks.
+    """
+    return done_line.search(data) is None
+
+
+def href_key(href):
+    """
+    Normalize an href or URL to its unquoted path, so that hrefs reported
+    by the server and URLs of caldav objects can be compared directly.
+    """
+    return unquote(urlparse(str(href)).path)
+
 # Todo 类：解析任务的 VTODO 数据
 
 def make_rrule(freq, interval=1):
@@ -136,85 +325,512 @@ def parse_rrule_to_minutes(rrule_str):
     return minutes * interval
 
 
+# ---------------------------
+# 周期规则：按算术直接求下一次发生时间，不逐个间隔循环
+# ---------------------------
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+byday_item = re.compile(r'^([+-]?\d{1,2})?(MO|TU|WE|TH|FR|SA|SU)$')
+# 不带 BY* 规则时每个间隔的固定长度（本地时间，不考虑夏令时）
+FIXED_STEPS = {
+    "MINUTELY": datetime.timedelta(minutes=1),
+    "HOURLY": datetime.timedelta(hours=1),
+    "DAILY": datetime.timedelta(days=1),
+    "WEEKLY": datetime.timedelta(weeks=1),
+}
+# RecurrenceRule 能处理的 RRULE 部分（WKST 只支持默认的 MO）
+RRULE_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY", "BYMONTH", "WKST"}
+# 查找下一个周期时最多检查的周期数（DAILY 规则按月计，例如只有 2 月 29 日的规则）
+MAX_PERIODS = 2000
+
+
+def _int_list(value):
+    return tuple(int(v) for v in value.split(",") if v.strip())
+
+
+class RecurrenceRule:
+    """
+    A compiled RRULE that finds occurrences arithmetically instead of
+    stepping through the series one interval at a time.
+
+    The series is anchored at the task's due time, which the client keeps
+    on the current occurrence. Supported parts: FREQ (MINUTELY to YEARLY),
+    INTERVAL, COUNT, UNTIL and, for DAILY and longer rules, BYDAY (with
+    ordinals such as 1MO or -1FR in MONTHLY and YEARLY rules), BYMONTHDAY
+    (not in WEEKLY rules, where RFC 5545 forbids it) and BYMONTH. Days a
+    month does not have (e.g. the 31st) are skipped, as RFC 5545 requires.
+    Rules with any other part (BYSETPOS, BYHOUR, ...), or with BY* parts
+    in MINUTELY and HOURLY rules, are rejected rather than approximated.
+
+    Fixed-length rules jump straight to the right interval; calendar
+    rules jump to the week, month or year containing the requested time
+    and expand only that period.
+    """
+    __slots__ = ("freq", "interval", "count", "until", "byday", "bymonthday", "bymonth")
+
+    def __init__(self, freq, interval=1, count=None, until=None, byday=(), bymonthday=(), bymonth=()):
+        self.freq = freq
+        self.interval = max(1, interval)
+        self.count = count
+        self.until = until
+        # ((序号或 0, 星期几 0-6), ...)
+        self.byday = byday
+        self.bymonthday = bymonthday
+        self.bymonth = bymonth
+
+    @classmethod
+    def parse(cls, rrule_str):
+        """Parse an RRULE value; raises ValueError for rules it cannot follow."""
+        parts = {}
+        for part in rrule_str.strip().split(";"):
+            if "=" in part:
+                k, v = part.split("=", 1)
+                parts[k.strip().upper()] = v.strip().upper()
+        freq = parts.get("FREQ")
+        if freq not in FIXED_STEPS and freq not in ("MONTHLY", "YEARLY"):
+            raise ValueError("unsupported FREQ: {}".format(freq))
+        # 不认识的部分（BYSETPOS、BYHOUR 等）会改变日期，忽略它们会算错并写回服务器
+        unsupported = set(parts) - RRULE_PARTS
+        if parts.get("WKST", "MO") != "MO":
+            unsupported.add("WKST")
+        if freq in ("MINUTELY", "HOURLY"):
+            unsupported.update(k for k in parts if k.startswith("BY"))
+        if unsupported:
+            raise ValueError("unsupported parts: {}".format(", ".join(sorted(unsupported))))
+        until = None
+        if "UNTIL" in parts:
+            until = parse_ical_datetime(parts["UNTIL"])
+            if until is None:
+                raise ValueError("bad UNTIL: {}".format(parts["UNTIL"]))
+            if len(parts["UNTIL"]) == 8:
+                # 只有日期时当天的发生都算在内
+                until += datetime.timedelta(days=1, microseconds=-1)
+        byday = []
+        for item in parts.get("BYDAY", "").split(","):
+            if not item:
+                continue
+            m = byday_item.match(item)
+            if m is None:
+                raise ValueError("bad BYDAY: {}".format(item))
+            byday.append((int(m.group(1) or 0), WEEKDAYS.index(m.group(2))))
+        if freq == "WEEKLY" and parts.get("BYMONTHDAY"):
+            raise ValueError("BYMONTHDAY is not allowed with FREQ=WEEKLY")
+        return cls(freq,
+                   interval=int(parts.get("INTERVAL", 1)),
+                   count=int(parts["COUNT"]) if "COUNT" in parts else None,
+                   until=until,
+                   byday=tuple(byday),
+                   bymonthday=_int_list(parts.get("BYMONTHDAY", "")),
+                   bymonth=_int_list(parts.get("BYMONTH", "")))
+
+    def _fixed(self):
+        """The length of one interval, or None if the rule is calendar based."""
+        if self.freq in ("MINUTELY", "HOURLY"):
+            return FIXED_STEPS[self.freq] * self.interval
+        if self.freq in FIXED_STEPS and not (self.byday or self.bymonthday or self.bymonth):
+            return FIXED_STEPS[self.freq] * self.interval
+        return None
+
+    # --- 周期 ---
+
+    def _period(self, start, when):
+        """Index of the day/week/month/year containing when, counted from start's."""
+        if self.freq == "DAILY":
+            return (when.date() - start.date()).days
+        if self.freq == "WEEKLY":
+            # 周一开始的周（WKST=MO）
+            return ((when.date() - start.date()).days + start.weekday()) // 7
+        if self.freq == "MONTHLY":
+            return (when.year - start.year) * 12 + when.month - start.month
+        return when.year - start.year
+
+    def _byMonthDay(self, year, month):
+        """BYMONTHDAY resolved for one month (negative values count from the end)."""
+        last = calendar.monthrange(year, month)[1]
+        days = {d if d > 0 else last + d + 1 for d in self.bymonthday}
+        return {d for d in days if 1 <= d <= last}
+
+    def _monthDays(self, year, month, start):
+        """Days of one month selected by BYMONTHDAY/BYDAY (or start's day)."""
+        last = calendar.monthrange(year, month)[1]
+        if not self.byday and not self.bymonthday:
+            return [start.day] if start.day <= last else []
+        days = self._byMonthDay(year, month) if self.bymonthday else None
+        if self.byday:
+            first = calendar.weekday(year, month, 1)
+            selected = set()
+            for ordinal, weekday in self.byday:
+                matching = range(1 + (weekday - first) % 7, last + 1, 7)
+                if not ordinal:
+                    selected.update(matching)
+                elif -len(matching) <= ordinal <= len(matching):
+                    selected.add(matching[ordinal - 1 if ordinal > 0 else ordinal])
+            # 同时给出 BYMONTHDAY 时 BYDAY 起限制作用
+            days = selected if days is None else days & selected
+        return sorted(days)
+
+    def _yearDates(self, year):
+        """Dates of a YEARLY rule with BYDAY and no BYMONTH: ordinals count within the year."""
+        jan1 = datetime.date(year, 1, 1)
+        length = 366 if calendar.isleap(year) else 365
+        dates = set()
+        for ordinal, weekday in self.byday:
+            matching = range((weekday - jan1.weekday()) % 7, length, 7)
+            if not ordinal:
+                dates.update(matching)
+            elif -len(matching) <= ordinal <= len(matching):
+                dates.add(matching[ordinal - 1 if ordinal > 0 else ordinal])
+        dates = [jan1 + datetime.timedelta(days=d) for d in sorted(dates)]
+        if self.bymonthday:
+            dates = [d for d in dates if d.day in self._byMonthDay(d.year, d.month)]
+        return dates
+
+    def _expand(self, start, p):
+        """Sorted occurrences in period p, at start's time of day."""
+        if self.freq == "DAILY":
+            day = start.date() + datetime.timedelta(days=p)
+            dates = [day]
+            if self.bymonth and day.month not in self.bymonth:
+                dates = []
+            if dates and self.byday and day.weekday() not in {wd for _, wd in self.byday}:
+                dates = []
+            if dates and self.bymonthday and day.day not in self._byMonthDay(day.year, day.month):
+                dates = []
+        elif self.freq == "WEEKLY":
+            monday = start.date() + datetime.timedelta(days=7 * p - start.weekday())
+            weekdays = sorted({wd for _, wd in self.byday}) or [start.weekday()]
+            dates = [monday + datetime.timedelta(days=wd) for wd in weekdays]
+            if self.bymonth:
+                dates = [d for d in dates if d.month in self.bymonth]
+        elif self.freq == "MONTHLY":
+            index = start.year * 12 + start.month - 1 + p
+            year, month = index // 12, index % 12 + 1
+            if self.bymonth and month not in self.bymonth:
+                return []
+            dates = [datetime.date(year, month, d) for d in self._monthDays(year, month, start)]
+        else:
+            year = start.year + p
+            if self.byday and not self.bymonth:
+                dates = self._yearDates(year)
+            else:
+                if self.bymonth:
+                    months = self.bymonth
+                elif self.bymonthday:
+                    months = range(1, 13)
+                else:
+                    months = (start.month,)
+                dates = [datetime.date(year, m, d) for m in sorted(months)
+                         for d in self._monthDays(year, m, start)]
+        return [datetime.datetime.combine(d, start.time()) for d in dates]
+
+    # --- 查询 ---
+
+    def _next(self, start, after):
+        """First occurrence later than after, ignoring COUNT and UNTIL."""
+        step = self._fixed()
+        if step is not None:
+            k = max(0, (after - start) // step + 1)
+            return start + k * step
+        if self.freq == "DAILY":
+            return self._nextDaily(start, after)
+        p = max(0, self._period(start, after))
+        # 只有 INTERVAL 的整数倍周期有发生
+        p += -p % self.interval
+        try:
+            for _ in range(MAX_PERIODS):
+                for occurrence in self._expand(start, p):
+                    if occurrence > after and occurrence >= start:
+                        return occurrence
+                p += self.interval
+        except (ValueError, OverflowError):
+            # 超出 datetime 能表示的年份，不会再有发生
+            pass
+        return None
+
+    def _nextDaily(self, start, after):
+        """_next() for a DAILY rule with BY* parts, searched month by month."""
+        first = max(start, after).date()
+        year, month = first.year, first.month
+        weekdays = {wd for _, wd in self.byday}
+        # 按月查找而不是按天：稀疏的规则（如 6 月的 13 日星期五）也能在 MAX_PERIODS 个月内找到
+        for _ in range(MAX_PERIODS):
+            if not self.bymonth or month in self.bymonth:
+                if self.bymonthday:
+                    days = sorted(self._byMonthDay(year, month))
+                else:
+                    days = range(1, calendar.monthrange(year, month)[1] + 1)
+                for d in days:
+                    day = datetime.date(year, month, d)
+                    if day < first or (day - start.date()).days % self.interval:
+                        continue
+                    if weekdays and day.weekday() not in weekdays:
+                        continue
+                    occurrence = datetime.datetime.combine(day, start.time())
+                    if occurrence > after:
+                        return occurrence
+            month += 1
+            if month > 12:
+                year, month = year + 1, 1
+                if year > datetime.MAXYEAR:
+                    break
+        return None
+
+    def _index(self, start, occurrence):
+        """Number of occurrences from start up to (not including) occurrence."""
+        step = self._fixed()
+        if step is not None:
+            return (occurrence - start) // step
+        n = 0
+        for p in range(0, self._period(start, occurrence) + 1, self.interval):
+            n += sum(1 for o in self._expand(start, p) if start <= o < occurrence)
+        return n
+
+    def next_after(self, start, after):
+        """
+        The first occurrence of the series anchored at start that is later
+        than after, or None if COUNT or UNTIL ended the series before it.
+        """
+        occurrence = self._next(start, after)
+        if occurrence is None:
+            return None
+        if self.until is not None and occurrence > self.until:
+            return None
+        if self.count is not None and self._index(start, occurrence) >= self.count:
+            return None
+        return occurrence
+
+    def last(self, start):
+        """The final occurrence of a COUNT rule anchored at start (None otherwise)."""
+        if self.count is None:
+            return None
+        step = self._fixed()
+        if step is not None:
+            return start + (self.count - 1) * step
+        occurrence = start - datetime.timedelta(microseconds=1)
+        for _ in range(self.count):
+            following = self._next(start, occurrence)
+            if following is None:
+                break
+            occurrence = following
+        return occurrence if occurrence >= start else None
+
+
+@functools.lru_cache(maxsize=512)
+def compile_rrule(rrule_str):
+    """RecurrenceRule for an RRULE string (cached), or None if it is empty or unsupported."""
+    if not rrule_str:
+        return None
+    try:
+        return RecurrenceRule.parse(rrule_str)
+    except ValueError as e:
+        print(f"[DEBUG] compile_rrule: {rrule_str}: {e}", file=sys.stderr)
+        return None
+
+
+def next_occurrence(rrule_str, due, now):
+    """
+    The next due time after now of a task due at due that repeats by
+    rrule_str. Returns due itself if it has not passed yet, and None if
+    the rule is unusable or the series has ended.
+    """
+    rule = compile_rrule(rrule_str)
+    if rule is None or due is None:
+        return None
+    if due > now:
+        return due
+    return rule.next_after(due, now)
+
+
+def rebase_rrule(rrule_str, start):
+    """
+    RRULE text for a series whose DUE is moved forward from start. A
+    COUNT (counted from start) is replaced by the UNTIL of its last
+    occurrence, so the moved series still ends on the same occurrence.
+    """
+    rule = compile_rrule(rrule_str)
+    if rule is None or rule.count is None:
+        return rrule_str
+    last = rule.last(start)
+    until = "UNTIL=" + last.strftime("%Y%m%dT%H%M%S")
+    return re.sub(r'(?i)COUNT=\d+', until, rrule_str)
+
+
+def unfold_ical(text):
+    """Undo RFC 5545 line folding."""
+    if "\n" in text:
+        text = re.sub(r'\r?\n[ \t]', '', text)
+    return text
+
+
+def _unquoted_colon(text, start, end):
+    quoted = False
+    for pos in range(start, end):
+        ch = text[pos]
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ":" and not quoted:
+            return pos
+    return end - 1
+
+
+def index_component(text, component="VTODO", wanted=None):
+    """
+    Single pass over the content lines of the first `component` in text.
+
+    Returns {NAME: (params, start, end)} for the component's own
+    properties, where text[start:end] is the (possibly folded) raw value;
+    the first occurrence of a property wins. Properties of nested
+    components (VALARM) and of other components (VTIMEZONE) are skipped.
+    params is the raw parameter string after the first ';'
+    (e.g. "TZID=Europe/Berlin"), or "" when there are none.
+
+    With wanted={NAME: position}, only those properties are indexed and a
+    flat list is returned instead: value offsets at [2 * position] and
+    [2 * position + 1], both 0 when the property is missing.
+    """
+    index = {} if wanted is None else [0] * (2 * len(wanted))
+    begin = "BEGIN:" + component
+    finish = "END:" + component
+    size = len(text)
+    pos = 0
+    depth = 0
+    inside = False
+    while pos < size:
+        # 逻辑行在下一物理行以空格或制表符开头时继续（RFC 5545 折行）
+        stop = text.find("\n", pos)
+        while stop >= 0 and text.startswith((" ", "\t"), stop + 1):
+            stop = text.find("\n", stop + 1)
+        if stop < 0:
+            stop = size
+        line_end = stop - 1 if stop > pos and text[stop - 1] == "\r" else stop
+        line_start, pos = pos, stop + 1
+
+        if not inside:
+            if text.startswith(begin, line_start) and line_end - line_start == len(begin):
+                inside = True
+            continue
+        if text.startswith("BEGIN:", line_start):
+            depth += 1
+            continue
+        if text.startswith("END:", line_start):
+            if not depth:
+                if text.startswith(finish, line_start):
+                    break
+                continue
+            depth -= 1
+            continue
+        if depth:
+            continue
+
+        colon = text.find(":", line_start, line_end)
+        if colon < 0:
+            continue
+        semi = text.find(";", line_start, colon)
+        if wanted is not None:
+            name = text[line_start:colon if semi < 0 else semi]
+            position = wanted.get(name.upper() if "\n" not in name else unfold_ical(name).upper())
+            if position is not None and not index[2 * position]:
+                if semi >= 0 and text.find('"', semi, colon) >= 0:
+                    colon = _unquoted_colon(text, semi, line_end)
+                index[2 * position] = colon + 1
+                index[2 * position + 1] = line_end
+            continue
+        params = ""
+        if semi >= 0:
+            # 参数值可以带引号并包含冒号，例如 TZID="GMT+01:00"
+            if text.find('"', semi, colon) >= 0:
+                colon = _unquoted_colon(text, semi, line_end)
+            params = unfold_ical(text[semi + 1:colon])
+            name = text[line_start:semi]
+        else:
+            name = text[line_start:colon]
+        name = unfold_ical(name).upper()
+        if name not in index:
+            index[name] = (params, colon + 1, line_end)
+    return index
+
+
+def parse_ical_datetime(value):
+    """
+    Parse DATE-TIME (20240131T235900, optional trailing Z) or DATE
+    (20240131) values into a naive datetime. Times are taken as written,
+    the same way the rest of the client treats them. Returns None if the
+    value cannot be parsed.
+    """
+    try:
+        if len(value) >= 15 and value[8] == "T":
+            return datetime.datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                                     int(value[9:11]), int(value[11:13]), int(value[13:15]))
+        if len(value) == 8:
+            return datetime.datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+    except ValueError:
+        pass
+    return None
+
+
+def _decode_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+# 属性名 -> (iCalendar 属性, 解码函数)
+TODO_FIELDS = {
+    "summary": ("SUMMARY", ical_unescape),
+    "created": ("CREATED", parse_ical_datetime),
+    "dtstamp": ("DTSTAMP", parse_ical_datetime),
+    "last_modified": ("LAST-MODIFIED", parse_ical_datetime),
+    "uid": ("UID", str),
+    "due": ("DUE", parse_ical_datetime),
+    "priority": ("PRIORITY", str),
+    "percent_complete": ("PERCENT-COMPLETE", _decode_int),
+    "status": ("STATUS", str),
+    "completed": ("COMPLETED", parse_ical_datetime),
+    "dtstart": ("DTSTART", parse_ical_datetime),
+    "description": ("DESCRIPTION", ical_unescape),
+    "related_to": ("RELATED-TO", str),
+    "rrule": ("RRULE", str),
+}
+TODO_PROPS = {prop: position for position, (prop, _) in enumerate(TODO_FIELDS.values())}
+TODO_POSITIONS = {name: position for position, name in enumerate(TODO_FIELDS)}
+
+
 class Todo:
+    """
+    A parsed VTODO. Construction only indexes where each property's value
+    sits in the source text; a field is decoded the first time it is read
+    and then stored in its slot. Once every field has been decoded the
+    source text and the index are released.
+    """
+    __slots__ = tuple(TODO_FIELDS) + ("_text", "_index", "_pending")
+
     def __init__(self, todo):
-        self.todo = todo
-        self.summary = re.search('SUMMARY:(.*?)\n', todo, re.DOTALL).group(1)
-        self.created = datetime.datetime.strptime(
-            re.search('CREATED(?:;X-VOBJ-FLOATINGTIME-ALLOWED=TRUE|):(.*?)(?:Z)?\n',
-                      todo, re.DOTALL).group(1),
-            '%Y%m%dT%H%M%S'
-        )
-        self.dtstamp = datetime.datetime.strptime(
-            re.search('DTSTAMP(?:;X-VOBJ-FLOATINGTIME-ALLOWED=TRUE|):(.*?)(?:Z)?\n',
-                      todo, re.DOTALL).group(1),
-            '%Y%m%dT%H%M%S'
-        )
-        self.last_modified = datetime.datetime.strptime(
-            re.search('LAST-MODIFIED(?:;X-VOBJ-FLOATINGTIME-ALLOWED=TRUE|):(.*?)(?:Z)?\n',
-                      todo, re.DOTALL).group(1),
-            '%Y%m%dT%H%M%S'
-        )
-        self.uid = re.search('UID:(.*?)\n', todo, re.DOTALL).group(1)
-        try:
-            # 修改这里，允许尾部 Z 可选
-            self.due = datetime.datetime.strptime(
-                re.search('DUE:(.*?)(?:Z)?\n', todo, re.DOTALL).group(1),
-                '%Y%m%dT%H%M%S'
-            )
-        except Exception:
-            self.due = None
-        try:
-            self.priority = re.search(
-                'PRIORITY:(.*?)\n', todo, re.DOTALL).group(1)
-        except:
-            self.priority = None
-        try:
-            self.percent_complete = int(
-                re.search('PERCENT-COMPLETE:(.*?)\n', todo, re.DOTALL).group(1))
-        except:
-            self.percent_complete = None
-        try:
-            self.status = re.search('STATUS:(.*?)\n', todo, re.DOTALL).group(1)
-        except:
-            self.status = None
-        try:
-            self.completed = datetime.datetime.strptime(
-                re.search('COMPLETED:(.*?)\n', todo, re.DOTALL).group(1),
-                '%Y%m%dT%H%M%S'
-            )
-        except:
-            self.completed = None
-        try:
-            self.dtstart = datetime.datetime.strptime(
-                re.search('DTSTART:(.*?)\n', todo, re.DOTALL).group(1),
-                '%Y%m%dT%H%M%S'
-            )
-        except:
-            self.dtstart = None
-        try:
-            self.description = re.search(
-                'DESCRIPTION:(.*?)\n', todo, re.DOTALL).group(1)
-        except:
-            self.description = None
-        try:
-            self.related_to = re.search(
-                'RELATED-TO:(.*?)\n', todo, re.DOTALL).group(1)
-        except:
-            self.related_to = None
+        self._text = todo
+        # 紧凑的偏移数组比字典加元组省内存
+        self._index = array.array("I", index_component(todo, wanted=TODO_PROPS))
+        self._pending = len(TODO_FIELDS)
 
-        # 只解析 VTODO 组件内的 RRULE，避免匹配到 VTIMEZONE 中的 RRULE
-        try:
-            # 先提取 VTODO 部分
-            vtodo_match = re.search(r'BEGIN:VTODO(.*?)END:VTODO', todo, re.DOTALL)
-            if vtodo_match:
-                vtodo_content = vtodo_match.group(1)
-                rrule_match = re.search(r'RRULE:(.*?)\n', vtodo_content, re.DOTALL)
-                self.rrule = rrule_match.group(1) if rrule_match else None
-            else:
-                self.rrule = None
-        except:
-            self.rrule = None
+    def __getattr__(self, name):
+        # 仅在槽位尚未赋值时调用
+        field = TODO_FIELDS.get(name)
+        if field is None or self._index is None:
+            raise AttributeError(name)
+        position = 2 * TODO_POSITIONS[name]
+        start, end = self._index[position], self._index[position + 1]
+        value = None
+        if start:
+            value = field[1](unfold_ical(self._text[start:end]))
+        setattr(self, name, value)
+        self._pending -= 1
+        if not self._pending:
+            self._text = self._index = None
+        return value
+
+    @property
+    def todo(self):
+        """The source iCalendar text, or None once fully materialized."""
+        return self._text
 
     def __str__(self):
         return "Todo(uid={}, summary={})".format(self.uid, self.summary)
@@ -246,92 +862,398 @@ class NextcloudTask:
             self.list = list_in
         self.connected = False
         self.sort = ("priority",)
+        self.client = None
+        # 最近一次成功获取时日历集合的 sync-token/ctag
+        self.ctag = None
+        # self.todos 为完整列表时对应的集合标签，用于跳过无变化的完整下载
+        self.todos_tag = None
+        # uid -> href，用于把 UID 转换为 calendar-multiget 所需的 href
+        self.uid_hrefs = {}
+        self.multiget_batch_size = int(config.get("multiget_batch_size", 100))
+        # 并发请求使用的 keep-alive 连接数
+        self.max_connections = int(config.get("max_connections", 8))
+        self.transport = None
+        # 缓存解析得到的日历句柄，避免每次操作都重新进行 principal/calendar 发现
+        self.calendar = None
 
-    def connect(self, username, password):
+    def connect(self, username, password, load=True):
+        """Log in; with load=False the task list is not downloaded yet."""
         try:
             url = self.url.split("://")[1]
         except IndexError:
             url = self.url
         self.client = caldav.DAVClient(
             "https://"+username+":"+password+"@"+url, ssl_verify_cert=self.config["ssl_verify_cert"])
-        try:
-            self.calendar = self.client.principal().calendar(self.list)
-        except caldav.error.NotFoundError:
-            raise ListNotFound(self.list)
-        self.todos = self.client.principal().calendar(self.list).todos()
+        if self.transport is not None:
+            # 重新登录时关闭旧的线程池，否则每次 connect() 都会遗留线程
+            self.transport.close()
+        self.transport = DAVTransport(self.client, self.max_connections)
+        self.invalidateCalendar()
+        self.todos_tag = None
+        if load:
+            self.updateTodos()
         self.connected = True
 
+    def getCalendar(self):
+        """
+        Return the cached calendar handle, running principal/calendar
+        discovery only when no handle is cached yet.
+        """
+        if self.calendar is None:
+            try:
+                self.calendar = self.client.principal().calendar(self.list)
+            except caldav.error.NotFoundError:
+                raise ListNotFound(self.list)
+        return self.calendar
+
+    def invalidateCalendar(self):
+        """Drop the cached calendar handle so the next call rediscovers it."""
+        self.calendar = None
+
+    def _withCalendar(self, operation, retry_not_found=True):
+        """
+        Run operation(calendar) against the cached calendar handle.
+        On 404/401 the handle may be stale (calendar moved, session expired),
+        so it is invalidated, rediscovered and the operation retried once.
+        Lookups of single tasks pass retry_not_found=False, since there a
+        404 usually means the task is gone, not the calendar.
+        """
+        calendar = self.getCalendar()
+        retry_on = (caldav.error.NotFoundError, caldav.error.AuthorizationError) \
+            if retry_not_found else caldav.error.AuthorizationError
+        try:
+            return operation(calendar)
+        except retry_on:
+            self.invalidateCalendar()
+            return operation(self.getCalendar())
+
+    def getCalendarTag(self):
+        """
+        Fetch the calendar's sync-token (or CalendarServer getctag) with a
+        single depth-0 PROPFIND. Returns None if the server reports neither.
+        """
+        def propfind(calendar):
+            response = self.client.propfind(str(calendar.url), calendar_tag_propfind, depth=0)
+            if response.status == 404:
+                raise caldav.error.NotFoundError(str(calendar.url))
+            return response
+
+        response = self._withCalendar(propfind)
+        if response.status != 207 or response.tree is None:
+            return None
+        tag = response.tree.findtext(".//" + DAV_NS + "sync-token")
+        if not tag:
+            tag = response.tree.findtext(".//" + CS_NS + "getctag")
+        return tag or None
+
     def updateTodos(self):
-        self.todos = self.client.principal().calendar(self.list).todos()
+        """
+        Download every VTODO, unless the calendar tag shows that the cached
+        self.todos is still current. Returns True if a download happened.
+        """
+        tag = self.getCalendarTag()
+        if tag is not None and tag == self.todos_tag:
+            return False
+
+        # 直接发送 calendar-query，并在本地过滤已完成任务；
+        # 新版 caldav 的 todos() 会在客户端展开重复规则，任务多时非常慢
+        def report(calendar):
+            response = self.client.report(str(calendar.url), todo_query_skeleton, depth=1)
+            if response.status == 404:
+                raise caldav.error.NotFoundError(str(calendar.url))
+            return calendar, response
 
-    def addTodo(self, summary, priority=0, percent_complete=0, rrule=None):
-        if percent_complete == 100:
-            status = "COMPLETED"
-        elif percent_complete == 0:
-            status = "NEEDS-ACTION"
+        calendar, response = self._withCalendar(report)
+        if response.status != 207 or response.tree is None:
+            raise caldav.error.ReportError(
+                "calendar-query failed with status {}".format(response.status))
+        todos = []
+        for resp in response.tree.iter(DAV_NS + "response"):
+            href = resp.findtext(DAV_NS + "href")
+            data = resp.findtext(".//" + CALDAV_NS + "calendar-data")
+            if href and data and "BEGIN:VTODO" in data and todo_is_pending(data):
+                todos.append(caldav.Todo(client=self.client, url=calendar.url.join(href),
+                                         data=data, parent=calendar))
+        self.todos = todos
+        self.ctag = self.todos_tag = tag
+        self.uid_hrefs = {}
+        self._rememberHrefs(self.todos)
+        return True
+
+    def _rememberHrefs(self, todos):
+        for t in todos:
+            match = uid_line.search(t.data or "")
+            if match:
+                self.uid_hrefs[match.group(1).strip()] = href_key(t.url)
+
+    def syncTodos(self, sync_token=None):
+        """
+        Run an RFC 6578 sync-collection REPORT against the calendar.
+        With no sync_token every resource is reported (initial sync),
+        otherwise only resources changed or removed since that token.
+        Returns (changed, removed, new_sync_token) where changed is a list
+        of caldav Todo objects and removed a list of normalized hrefs.
+        self.todos is patched in place to reflect the changes.
+        """
+        body = sync_collection_skeleton.format(xml_escape(sync_token or ""))
+
+        def report(calendar):
+            response = self.client.report(str(calendar.url), body, depth=1)
+            if response.status == 404:
+                raise caldav.error.NotFoundError(str(calendar.url))
+            return calendar, response
+
+        try:
+            calendar, response = self._withCalendar(report)
+        except caldav.error.AuthorizationError:
+            # caldav 把 403 当作授权错误抛出；带 token 时多半是 token 失效，
+            # 真正的认证问题会在随后的完整同步中再次暴露
+            if sync_token:
+                raise SyncTokenExpired()
+            raise
+        if response.status in (403, 409) and sync_token:
+            # RFC 6578 3.2: DAV:valid-sync-token 前置条件失败
+            raise SyncTokenExpired()
+        if response.status != 207 or response.tree is None:
+            raise SyncNotSupported()
+
+        changed = []
+        removed = []
+        missing = []
+        for resp in response.tree.iter(DAV_NS + "response"):
+            href = resp.findtext(DAV_NS + "href")
+            if not href:
+                continue
+            status = resp.findtext(DAV_NS + "status") or ""
+            if " 404 " in status:
+                removed.append(href_key(href))
+                continue
+            data = resp.findtext(".//" + CALDAV_NS + "calendar-data")
+            if not data or not data.strip():
+                # 服务器未随 sync-collection 返回 calendar-data，稍后批量获取
+                missing.append(href)
+                continue
+            # 日历里也可能有 VEVENT，只保留 VTODO
+            if "BEGIN:VTODO" not in data:
+                continue
+            # 与完整下载保持一致：已完成的任务视为从列表中移除
+            if not todo_is_pending(data):
+                removed.append(href_key(href))
+                continue
+            changed.append(caldav.Todo(client=self.client, url=calendar.url.join(href),
+                                       data=data, parent=calendar))
+        for href, data in self._multiget(missing):
+            if "BEGIN:VTODO" in data and not todo_is_pending(data):
+                removed.append(href_key(href))
+            elif "BEGIN:VTODO" in data:
+                changed.append(caldav.Todo(client=self.client, url=calendar.url.join(href),
+                                           data=data, parent=calendar))
+        self._rememberHrefs(changed)
+
+        new_token = response.tree.findtext(DAV_NS + "sync-token")
+        self.ctag = new_token
+
+        if sync_token:
+            drop = set(removed)
+            drop.update(href_key(t.url) for t in changed)
+            todos = [t for t in getattr(self, "todos", []) if href_key(t.url) not in drop]
+            self.todos = todos + changed
+            # 只有在修补前 self.todos 已是完整列表时，修补后才仍然完整
+            if self.todos_tag is not None:
+                self.todos_tag = new_token
         else:
-            status = "IN-PROCESS"
-        todo = todo_skeleton.format(
-            datetime.datetime.now().strftime('%Y%m%dT%H%M%S'),
-            datetime.datetime.now().strftime('%Y%m%dT%H%M%S'),
-            datetime.datetime.now().strftime('%Y%m%dT%H%M%S'),
-            summary, str(uuid.uuid4()), str(
-                priority), str(percent_complete), status
-        )
-        if rrule:
-            todo = todo.replace("END:VTODO", f"RRULE:{rrule}\nEND:VTODO")
-        self.calendar.save_todo(todo)
-        self.updateTodos()
-
-    def updateTodo(self, uid, summary=None, start=None, due=None, note=None,
+            self.todos = changed
+            self.todos_tag = new_token
+        return changed, removed, new_token
+
+    def addTodo(self, summary, priority=0, percent_complete=0, rrule=None,
+                due=None, note=None, categories=None, start=None, uid=None):
+        """
+        Create a task with a single PUT carrying the complete VTODO and
+        return its UID (generated unless given). No refetch of the
+        calendar is done.
+        """
+        uid, todo = make_todo(summary, priority=priority, percent_complete=percent_complete,
+                              rrule=rrule, due=due, note=note, categories=categories, start=start,
+                              uid=uid)
+        saved = self._withCalendar(lambda calendar: calendar.save_todo(todo))
+        # 直接把新任务并入缓存列表，不再整表重新下载
+        if saved is not None and hasattr(self, "todos"):
+            self.todos.append(saved)
+            self.uid_hrefs[uid] = href_key(saved.url)
+        return uid
+
+    def addTodos(self, items, concurrency=None):
+        """
+        Create several tasks concurrently. items is a list of keyword
+        dicts accepted by addTodo. Returns a list with the new UID or the
+        exception raised for each item, in the same order.
+        """
+        calendar = self.getCalendar()
+        created = [make_todo(**item) for item in items]
+        results = self.transport.run(
+            (self._put(calendar.url.join(uid + ".ics"), data, uid) for uid, data in created),
+            concurrency)
+        for uid, result in zip([c[0] for c in created], results):
+            if not isinstance(result, Exception):
+                self.uid_hrefs[uid] = href_key(calendar.url.join(uid + ".ics"))
+        return results
+
+    def saveTodos(self, todos, concurrency=None):
+        """
+        PUT several modified caldav Todo objects concurrently. Returns a
+        list with None or the exception raised for each object, in order.
+        """
+        coroutines = []
+        for todo in todos:
+            data = todo.icalendar_instance.to_ical()
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            coroutines.append(self._put(todo.url, data, None))
+        return self.transport.run(coroutines, concurrency)
+
+    async def _put(self, url, data, result):
+        response = await self.transport.request(
+            "PUT", url, data, {"Content-Type": "text/calendar; charset=utf-8"})
+        if response.status not in (200, 201, 204):
+            raise caldav.error.PutError("PUT {} failed with status {}".format(url, response.status))
+        return result
+
+    def updateTodo(self, uid, summary=None, start=None, due=UNSET, note=None,
                    priority=None, percent_complete=None, categories=None, rrule=None):
         todo = self.getTodoByUid(uid)
-        if summary is not None:
-            todo.icalendar_component['SUMMARY'] = summary
-        if note is not None:
-            todo.icalendar_component['DESCRIPTION'] = note
-        if categories is not None:
-            todo.icalendar_component['CATEGORIES'] = categories
-        if start is not None:
-            todo.icalendar_component['DTSTART'] = start.strftime(
-                '%Y%m%dT%H%M%S')
-        if due is not None:
-            todo.icalendar_component['DUE'] = due.strftime('%Y%m%dT%H%M%S')
-        elif 'DUE' in todo.icalendar_component:
-            del todo.icalendar_component['DUE']
-        if priority is not None:
-            todo.icalendar_component['PRIORITY'] = priority
-        if percent_complete is not None:
-            todo.icalendar_component['PERCENT-COMPLETE'] = percent_complete
-            if percent_complete == 0:
-                todo.icalendar_component['STATUS'] = "NEEDS-ACTION"
-            elif percent_complete == 100:
-                todo.icalendar_component['STATUS'] = "COMPLETED"
-                todo.icalendar_component['COMPLETED'] = datetime.datetime.now().strftime(
-                    '%Y%m%dT%H%M%S')
-            else:
-                todo.icalendar_component['STATUS'] = "IN-PROCESS"
-        
-        if rrule == "": # Explicit delete if empty string passed
-            # 删除 VTODO 组件中的 RRULE
-            if 'RRULE' in todo.icalendar_component:
-                del todo.icalendar_component['RRULE']
-        elif rrule is not None:
-            from icalendar import vRecur
-            # Set or Update RRULE
-            # vRecur.from_ical returns a dict, we must wrap it in vRecur object for correct serialization
-            todo.icalendar_component['RRULE'] = vRecur(vRecur.from_ical(rrule))
-        
-        todo.icalendar_component['LAST-MODIFIED'] = datetime.datetime.now().strftime(
-            '%Y%m%dT%H%M%S')
-        # 清除 _data 缓存，强制从 icalendar_instance 重新生成数据
-        # 这确保对 icalendar_component 的修改会被正确保存到服务器
-        todo._data = None
+        apply_todo_changes(todo, summary=summary, start=start, due=due, note=note,
+                           priority=priority, percent_complete=percent_complete,
+                           categories=categories, rrule=rrule)
+        # 不重新下载日历：调用方随后的增量同步会取回这次修改
         todo.save()
-        self.updateTodos()
+
+    def updateTodosBatch(self, updates, concurrency=None, saved=None):
+        """
+        Apply several updateTodo-style changes with one calendar-multiget
+        to load the tasks and concurrent PUTs to store them, without
+        refetching the calendar. updates is a list of (uid, fields) where
+        fields are updateTodo keyword arguments. Returns a list with None
+        or the exception for each update, in order. If saved is a dict,
+        the calendar data stored for each successful update is put in it
+        by uid.
+        """
+        objects = {}
+        for obj in self._fetchObjects([uid for uid, _ in updates]):
+            objects[str(obj.icalendar_component.get("UID"))] = obj
+
+        results = [None] * len(updates)
+        pending = []
+        for i, (uid, fields) in enumerate(updates):
+            todo = objects.get(uid)
+            if todo is None:
+                results[i] = TaskNotFound(uid)
+                continue
+            try:
+                apply_todo_changes(todo, **fields)
+            except Exception as e:
+                results[i] = e
+                continue
+            pending.append((i, todo))
+
+        for (i, todo), result in zip(pending, self.saveTodos([todo for _, todo in pending], concurrency)):
+            results[i] = result
+            if result is None and saved is not None:
+                data = todo.icalendar_instance.to_ical()
+                saved[updates[i][0]] = data.decode("utf-8") if isinstance(data, bytes) else data
+        return results
+
+    def _multiget(self, hrefs, batch_size=None):
+        """
+        Fetch calendar data for hrefs with calendar-multiget REPORTs of at
+        most batch_size hrefs each, sent concurrently. Returns a list of
+        (href, data) for the resources that exist; missing hrefs are
+        silently skipped.
+        """
+        batch_size = max(1, int(batch_size or self.multiget_batch_size))
+        if not hrefs:
+            return []
+        calendar = self.getCalendar()
+
+        async def report(batch):
+            body = calendar_multiget_skeleton.format("\n".join(
+                "  <d:href>{}</d:href>".format(xml_escape(href)) for href in batch))
+            # RFC 4791 7.9：calendar-multiget 不应带 Depth 头
+            response = await self.transport.request("REPORT", calendar.url, body)
+            if response.status != 207 or response.tree is None:
+                raise caldav.error.ReportError(
+                    "calendar-multiget failed with status {}".format(response.status))
+            return response
+
+        responses = self.transport.run(
+            report(hrefs[start:start + batch_size]) for start in range(0, len(hrefs), batch_size))
+        results = []
+        for response in responses:
+            if isinstance(response, Exception):
+                raise response
+            for resp in response.tree.iter(DAV_NS + "response"):
+                href = resp.findtext(DAV_NS + "href")
+                data = resp.findtext(".//" + CALDAV_NS + "calendar-data")
+                if href and data and data.strip():
+                    results.append((href, data))
+        return results
+
+    def _fetchObjects(self, refs, batch_size=None):
+        """
+        Load caldav Todo objects for hrefs or UIDs with calendar-multiget.
+        UIDs are resolved through the hrefs seen in earlier fetches, falling
+        back to the "<uid>.ics" name used when creating tasks, and finally
+        to a single lookup by UID if that is not found.
+        """
+        calendar = self.getCalendar()
+        hrefs = []
+        uids = []
+        base = href_key(calendar.url)
+        if not base.endswith("/"):
+            base += "/"
+        for ref in refs:
+            if "/" in ref:
+                hrefs.append(ref)
+                continue
+            hrefs.append(self.uid_hrefs.get(ref) or base + ref + ".ics")
+            uids.append(ref)
+
+        objects = []
+        found = set()
+        for href, data in self._multiget(hrefs, batch_size):
+            if "BEGIN:VTODO" not in data:
+                continue
+            obj = caldav.Todo(client=self.client, url=calendar.url.join(href),
+                              data=data, parent=calendar)
+            objects.append(obj)
+            match = uid_line.search(data)
+            if match:
+                found.add(match.group(1).strip())
+                self.uid_hrefs[match.group(1).strip()] = href_key(href)
+
+        for uid in uids:
+            if uid in found:
+                continue
+            try:
+                obj = self.getTodoByUid(uid)
+            except caldav.error.NotFoundError:
+                continue
+            objects.append(obj)
+            self.uid_hrefs[uid] = href_key(obj.url)
+        return objects
+
+    def fetchTodos(self, refs, batch_size=None):
+        """
+        Fetch several tasks at once with calendar-multiget and return them
+        as parsed Todo objects. refs may mix hrefs (anything containing a
+        "/") and UIDs. batch_size defaults to the multiget_batch_size
+        config value.
+        """
+        return [Todo(obj.data) for obj in self._fetchObjects(refs, batch_size)]
 
     def getTodoByUid(self, uid):
-        return self.client.principal().calendar(self.list).todo_by_uid(uid)
+        return self._withCalendar(lambda calendar: calendar.todo_by_uid(uid),
+                                  retry_not_found=False)
 
     def getUidbySummary(self, summary):
         output = ""
@@ -350,7 +1272,51 @@ class NextcloudTask:
         """
         try:
             # 获取对应的任务对象，然后调用其 delete() 方法
-            todo = self.client.principal().calendar(self.list).todo_by_uid(uid)
+            todo = self.getTodoByUid(uid)
             todo.delete()
         except caldav.error.NotFoundError:
             raise TaskNotFound(uid)
+
+    def deleteByUids(self, uids):
+        """
+        Delete several tasks concurrently. Returns a list with None or the
+        exception (TaskNotFound for missing tasks) for each uid, in order.
+        """
+        calendar = self.getCalendar()
+        urls = [calendar.url.join(self.uid_hrefs.get(uid) or uid + ".ics") for uid in uids]
+
+        async def delete(uid, url):
+            response = await self.transport.request("DELETE", url)
+            if response.status == 404:
+                raise TaskNotFound(uid)
+            if response.status not in (200, 204):
+                raise caldav.error.DeleteError(
+                    "DELETE {} failed with status {}".format(url, response.status))
+
+        results = self.transport.run(delete(uid, url) for uid, url in zip(uids, urls))
+        for i, (uid, result) in enumerate(zip(uids, results)):
+            if not isinstance(result, TaskNotFound):
+                continue
+            # 其他客户端创建的任务不一定叫 "<uid>.ics"，与 _fetchObjects 一样再按 UID 查找一次
+            try:
+                todo = self.getTodoByUid(uid)
+            except caldav.error.NotFoundError:
+                continue
+            except Exception as e:
+                results[i] = e
+                continue
+            try:
+                todo.delete()
+            except Exception as e:
+                results[i] = e
+                continue
+            results[i] = None
+            urls[i] = todo.url
+        deleted = set()
+        for uid, url, result in zip(uids, urls, results):
+            if not isinstance(result, Exception):
+                self.uid_hrefs.pop(uid, None)
+                deleted.add(href_key(url))
+        if deleted and hasattr(self, "todos"):
+            self.todos = [t for t in self.todos if href_key(t.url) not in deleted]
+        return results
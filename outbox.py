@@ -0,0 +1,152 @@
+# ---------------------------
+# 离线发件箱：服务器调用失败时保存待执行的操作，恢复连接后按顺序重放
+# ---------------------------
+
+
+import json
+import os
+import sys
+from binary_tasks import binary_path
+from local_tasks import _json_value
+from sqlite_tasks import db_path
+from task_record import TaskRecord
+
+
+def outbox_path(path_tasks):
+    """tasks.json -> tasks.json.outbox, whichever store backend is used."""
+    return path_tasks + ".outbox"
+
+
+def open_outbox(path_tasks):
+    """
+    The outbox for the tasks_json_path setting. Operations queued next to
+    tasks.bin or tasks.db by earlier versions are moved into it, so they
+    are still sent after "local_store" or "snapshot_format" changes.
+    """
+    outbox = Outbox(outbox_path(path_tasks))
+    for path_store in (binary_path(path_tasks), db_path(path_tasks)):
+        path_old = outbox_path(path_store)
+        if path_store == path_tasks or not os.path.exists(path_old):
+            continue
+        old = Outbox(path_old)
+        for entry in old.entries:
+            if entry["op"] == "add":
+                outbox.add(entry["uid"], entry["fields"])
+            elif entry["op"] == "update":
+                outbox.update(entry["uid"], entry["fields"])
+            elif entry["op"] == "delete":
+                outbox.delete(entry["uid"])
+        os.remove(path_old)
+        print(f"[DEBUG] open_outbox: moved {len(old)} queued operations from {path_old}", file=sys.stderr)
+    return outbox
+
+
+class Outbox:
+    """
+    Persistent queue of server operations that could not be sent, kept in
+    tasks.json.outbox and rewritten atomically on every change.
+
+    Entries are {"op": "add" | "update" | "delete", "uid": ..., "fields": {...}}
+    with TaskRecord field names. Operations on the same uid are coalesced
+    into at most one entry, which keeps the position of the first one:
+
+        add + update     -> add with the merged fields
+        add + delete     -> nothing
+        update + update  -> update with the merged fields
+        update + delete  -> delete
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [e for e in entries if isinstance(e, dict) and e.get("uid")]
+
+    def _save(self):
+        if not self.entries:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        path_tmp = self.path + ".tmp"
+        with open(path_tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, default=_json_value)
+        os.replace(path_tmp, self.path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _find(self, uid):
+        for i, entry in enumerate(self.entries):
+            if entry["uid"] == uid:
+                return i, entry
+        return None, None
+
+    def has(self, uid):
+        return self._find(uid)[1] is not None
+
+    def add(self, uid, fields):
+        i, entry = self._find(uid)
+        fields = json.loads(json.dumps(fields, default=_json_value))
+        if entry is None:
+            self.entries.append({"op": "add", "uid": uid, "fields": fields})
+        else:
+            # 同一 uid 重新创建（PUT 会覆盖），以新内容为准
+            self.entries[i] = {"op": "add", "uid": uid, "fields": fields}
+        self._save()
+
+    def update(self, uid, fields):
+        i, entry = self._find(uid)
+        fields = json.loads(json.dumps(fields, default=_json_value))
+        if entry is None:
+            self.entries.append({"op": "update", "uid": uid, "fields": fields})
+        elif entry["op"] == "delete":
+            # 任务已删除，修改没有意义
+            return
+        else:
+            entry["fields"].update(fields)
+        self._save()
+
+    def delete(self, uid):
+        i, entry = self._find(uid)
+        if entry is None:
+            self.entries.append({"op": "delete", "uid": uid, "fields": {}})
+        elif entry["op"] == "add":
+            # 服务器上从未创建过，直接丢弃
+            del self.entries[i]
+        else:
+            self.entries[i] = {"op": "delete", "uid": uid, "fields": {}}
+        self._save()
+
+    def remove(self, uids):
+        """Drop the entries for uids after they reached the server."""
+        uids = set(uids)
+        if uids:
+            self.entries = [e for e in self.entries if e["uid"] not in uids]
+            self._save()
+
+    def apply(self, tasks):
+        """
+        Overlay the pending operations on a task list fetched from the
+        server, so that unsent local changes stay visible. Returns the list.
+        """
+        index = {t.uid: t for t in tasks if t.uid}
+        deleted = set()
+        for entry in self.entries:
+            uid = entry["uid"]
+            if entry["op"] == "delete":
+                deleted.add(uid)
+            elif uid in index:
+                index[uid].update(entry["fields"])
+            elif entry["op"] == "add":
+                task = TaskRecord.from_dict(dict(entry["fields"], uid=uid))
+                index[uid] = task
+                tasks.append(task)
+        if deleted:
+            tasks[:] = [t for t in tasks if t.uid not in deleted]
+        return tasks
@@ -0,0 +1,159 @@
+# ---------------------------
+# SQLite 本地任务存储：单行事务更新，替代每次重写整个 tasks.json
+# ---------------------------
+
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from local_tasks import load_local_tasks
+from task_record import TaskRecord, DUE_FORMAT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    uid TEXT,
+    summary TEXT,
+    priority,
+    due TEXT,
+    status TEXT,
+    description TEXT,
+    percent_complete INTEGER,
+    rrule TEXT,
+    last_modified TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_uid ON tasks (uid);
+CREATE INDEX IF NOT EXISTS tasks_due ON tasks (due);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS tasks_last_modified ON tasks (last_modified);
+"""
+
+COLUMNS = ("uid", "summary", "priority", "due", "status", "description",
+           "percent_complete", "rrule", "last_modified", "extra")
+INSERT = "INSERT INTO tasks ({}) VALUES ({})".format(", ".join(COLUMNS), ", ".join("?" * len(COLUMNS)))
+
+
+def db_path(path_tasks):
+    """tasks.json -> tasks.db"""
+    return os.path.splitext(path_tasks)[0] + ".db"
+
+
+def _row(task):
+    return (task.uid, task.summary, task.priority,
+            task.due.strftime(DUE_FORMAT) if task.due else None,
+            task.status, task.description, task.percent_complete, task.rrule,
+            task.last_modified,
+            json.dumps(task.extra, ensure_ascii=False) if task.extra else None)
+
+
+def _record(row):
+    # row 以 id 开头，其后与 COLUMNS 顺序一致
+    fields = dict(zip(COLUMNS, row[1:]))
+    extra = fields.pop("extra")
+    return TaskRecord(extra=json.loads(extra) if extra else None, **fields)
+
+
+class SqliteTaskStore:
+    """
+    Local task store in an SQLite database next to tasks.json, with the
+    same interface as local_tasks.JsonTaskStore. Rows are indexed by uid,
+    due, status and last_modified, and add/update/delete touch only the
+    affected rows in a single transaction.
+
+    On first use an existing tasks.json is imported once; the JSON file is
+    left in place as a backup.
+    """
+
+    def __init__(self, path_tasks):
+        self.json_path = path_tasks
+        self.path = db_path(path_tasks)
+        self._lock = threading.Lock()
+        # 同一连接会在后台线程与界面线程中使用，由 _lock 串行化
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            self._migrate()
+
+    def _migrate(self):
+        # 导入与标记在同一事务中完成，中途失败时下次启动会重新导入
+        tasks = load_local_tasks(self.json_path) if os.path.exists(self.json_path) else []
+        with self._lock, self.conn:
+            self._replace(tasks)
+            self.conn.execute("PRAGMA user_version = 1")
+        print(f"[DEBUG] SqliteTaskStore: migrated {len(tasks)} tasks from {self.json_path}", file=sys.stderr)
+
+    def load(self):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, {} FROM tasks ORDER BY id".format(", ".join(COLUMNS))).fetchall()
+        return [_record(row) for row in rows]
+
+    def save(self, tasks):
+        """Replace the whole task list in one transaction."""
+        with self._lock, self.conn:
+            self._replace(tasks)
+
+    def _replace(self, tasks):
+        self.conn.execute("DELETE FROM tasks")
+        self.conn.executemany(INSERT, [_row(task) for task in tasks])
+
+    def add(self, task):
+        with self._lock, self.conn:
+            self.conn.execute(INSERT, _row(task))
+
+    def _where(self, uid, summary):
+        if uid:
+            return "uid = ?", (uid,)
+        return "summary = ?", (summary,)
+
+    def update(self, uid, summary, fields):
+        """
+        Apply fields to the first task with this uid (or, without a uid,
+        this summary). Does nothing if there is no such task.
+        """
+        with self._lock, self.conn:
+            self._update(uid, summary, fields)
+
+    def update_many(self, updates):
+        """Apply several (uid, summary, fields) updates in one transaction."""
+        with self._lock, self.conn:
+            for uid, summary, fields in updates:
+                self._update(uid, summary, fields)
+
+    def _update(self, uid, summary, fields):
+        where, args = self._where(uid, summary)
+        row = self.conn.execute(
+            "SELECT id, {} FROM tasks WHERE {} ORDER BY id LIMIT 1".format(
+                ", ".join(COLUMNS), where), args).fetchone()
+        if row is None:
+            return
+        task = _record(row)
+        task.update(fields)
+        self.conn.execute(
+            "UPDATE tasks SET {} WHERE id = ?".format(", ".join(c + " = ?" for c in COLUMNS)),
+            _row(task) + (row[0],))
+
+    def delete(self, uid, summary):
+        """Delete every task with this uid (or, without a uid, this summary)."""
+        where, args = self._where(uid, summary)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM tasks WHERE " + where, args)
+
+    def merge(self, tasks, removed_uids):
+        """
+        Replace or insert tasks by uid and delete the tasks in removed_uids
+        in one transaction, touching only those rows.
+        """
+        update = "UPDATE tasks SET {} WHERE uid = ?".format(", ".join(c + " = ?" for c in COLUMNS))
+        with self._lock, self.conn:
+            for task in tasks:
+                row = _row(task)
+                if self.conn.execute(update, row + (task.uid,)).rowcount == 0:
+                    self.conn.execute(INSERT, row)
+            self.conn.executemany("DELETE FROM tasks WHERE uid = ?", [(uid,) for uid in removed_uids])
+
+    def close(self):
+        self.conn.close()
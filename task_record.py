@@ -0,0 +1,108 @@
+# ---------------------------
+# 任务记录：本地文件、TaskHandler、对话框与主窗口共用的任务类型
+# ---------------------------
+
+
+import datetime
+
+DUE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def parse_due(value):
+    """Turn a stored due value (ISO string or datetime) into a datetime or None."""
+    if not value:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value
+    try:
+        return datetime.datetime.strptime(value, DUE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+class TaskRecord:
+    """
+    One task as the client sees it. due is always a datetime or None;
+    strings only exist in tasks.json and are converted when loading and
+    saving. Keys in tasks.json that the client does not know are kept in
+    extra and written back unchanged.
+    """
+    __slots__ = ("summary", "uid", "priority", "due", "status", "description",
+                 "percent_complete", "rrule", "last_modified", "extra")
+
+    # 与 Todo.to_dict() 的字段顺序一致
+    FIELDS = ("summary", "uid", "priority", "due", "status", "description",
+              "percent_complete", "rrule", "last_modified")
+
+    def __init__(self, summary="", uid=None, priority=None, due=None, status=None,
+                 description=None, percent_complete=None, rrule=None, last_modified=None,
+                 extra=None):
+        self.summary = summary
+        self.uid = uid
+        self.priority = priority
+        self.due = parse_due(due)
+        self.status = status
+        self.description = description
+        self.percent_complete = percent_complete
+        self.rrule = rrule
+        self.last_modified = last_modified
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a tasks.json entry or a dialog's getData()."""
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS}
+        fields = {k: data[k] for k in cls.FIELDS if k in data}
+        return cls(extra=extra or None, **fields)
+
+    @classmethod
+    def from_todo(cls, todo):
+        """Build a record from a parsed nextcloudtasks.Todo."""
+        return cls(summary=todo.summary,
+                   uid=todo.uid,
+                   priority=todo.priority,
+                   due=todo.due,
+                   status=todo.status,
+                   description=todo.description,
+                   percent_complete=todo.percent_complete,
+                   rrule=todo.rrule,
+                   last_modified=todo.last_modified.strftime(DUE_FORMAT) if todo.last_modified else None)
+
+    def to_dict(self):
+        """The tasks.json form: due as an ISO string, extra keys last."""
+        data = {
+            "summary": self.summary,
+            "uid": self.uid,
+            "priority": self.priority,
+            "due": self.due.strftime(DUE_FORMAT) if self.due else None,
+            "status": self.status,
+            "description": self.description,
+            "percent_complete": self.percent_complete,
+            "rrule": self.rrule,
+            "last_modified": self.last_modified,
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def copy(self):
+        task = TaskRecord.__new__(TaskRecord)
+        for name in self.FIELDS:
+            setattr(task, name, getattr(self, name))
+        task.extra = dict(self.extra) if self.extra else None
+        return task
+
+    def update(self, data):
+        """Apply the fields in data (e.g. from EditTaskDialog.getData())."""
+        for key, value in data.items():
+            if key == "due":
+                value = parse_due(value)
+            if key in self.FIELDS:
+                setattr(self, key, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def __repr__(self):
+        return "TaskRecord(uid={}, summary={})".format(self.uid, self.summary)
@@ -0,0 +1,140 @@
+# ---------------------------
+# 任务搜索：summary 与 description 的三元组（trigram）倒排索引
+# ---------------------------
+
+
+import array
+from itertools import compress, repeat
+
+
+def search_text(task):
+    """The casefolded text a task is searched by."""
+    return "{}\n{}".format(task.summary or "", task.description or "").casefold()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TaskSearchIndex:
+    """
+    Inverted index from every three-character substring of a task's
+    summary and description to the tasks containing it.
+
+    search("buy milk") splits the query into words and returns the keys
+    of the tasks containing every word as a substring (case-insensitive).
+    Words of three or more characters intersect the posting lists of
+    their trigrams, smallest first, and only the remaining candidates
+    are confirmed with a substring test (a three-letter word needs
+    none). Shorter words are tested against those candidates, or against
+    every text when the query has no longer word. While the user keeps
+    typing (each old word is part of a new word), the previous result
+    bounds the candidates.
+
+    Each indexed text gets a small integer id and posting lists are
+    array("I") of ids, 4 bytes per entry. Changing or removing a task
+    only retires its id, which search() then skips; the postings are
+    rebuilt once retired ids outnumber live ones. set() and remove() thus
+    update a single task in time proportional to its own text.
+    """
+
+    def __init__(self):
+        self.texts = {}      # key -> 索引的文本
+        self._rebuild()
+
+    @classmethod
+    def build(cls, items):
+        """An index over (key, task) pairs."""
+        index = cls()
+        for key, task in items:
+            index.set(key, task)
+        return index
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _rebuild(self):
+        self.ids = {}        # key -> id
+        self.keyOf = []      # id -> key（已失效的为 None）
+        self.textOf = []     # id -> 文本（已失效的为空字符串）
+        self.postings = {}   # n-gram -> array("I") of ids
+        self.retired = 0
+        self._last = ((), None)
+        for key, text in self.texts.items():
+            self._insert(key, text)
+
+    def _insert(self, key, text):
+        task_id = self.ids[key] = len(self.keyOf)
+        self.keyOf.append(key)
+        self.textOf.append(text)
+        postings = self.postings
+        for gram in trigrams(text):
+            ids = postings.get(gram)
+            if ids is None:
+                ids = postings[gram] = array.array("I")
+            ids.append(task_id)
+
+    def _retire(self, key):
+        task_id = self.ids.pop(key)
+        self.keyOf[task_id] = None
+        self.textOf[task_id] = ""
+        self.retired += 1
+
+    def set(self, key, task):
+        text = search_text(task)
+        old = self.texts.get(key)
+        if old == text:
+            return
+        self._last = ((), None)
+        if old is not None:
+            self._retire(key)
+        self.texts[key] = text
+        self._insert(key, text)
+        self._compact()
+
+    def remove(self, key):
+        if self.texts.pop(key, None) is None:
+            return
+        self._last = ((), None)
+        self._retire(key)
+        self._compact()
+
+    def _compact(self):
+        if self.retired > 1000 and self.retired > len(self.texts):
+            self._rebuild()
+
+    def search(self, query):
+        """Keys of the tasks matching every word of query, or None for an empty query."""
+        words = tuple(query.casefold().split())
+        if not words:
+            return None
+        unique = set(words)
+        postings = []
+        for word in unique:
+            for gram in trigrams(word):
+                ids = self.postings.get(gram)
+                if not ids:
+                    return set()
+                postings.append(ids)
+        # 以下都在 id 上计算，最后一次性换成 key
+        if postings:
+            postings.sort(key=len)
+            ids = set(postings[0])
+            for other in postings[1:]:
+                ids.intersection_update(other)
+        else:
+            ids = range(len(self.textOf))
+        last_words, last_ids = self._last
+        if last_ids is not None and all(any(old in new for new in words) for old in last_words):
+            ids = last_ids.intersection(ids)
+
+        # 三元组都出现不代表整个单词出现，逐个确认子串；map/compress 让循环在 C 中执行
+        for word in unique:
+            if len(word) != 3:
+                candidates = list(ids)
+                found = map(str.__contains__, map(self.textOf.__getitem__, candidates), repeat(word))
+                ids = compress(candidates, found)
+        ids = set(ids)
+        self._last = (words, ids)
+        # 失效的 id 对应 None，被 filter 去掉
+        return set(filter(None, map(self.keyOf.__getitem__, ids)))
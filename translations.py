@@ -84,6 +84,15 @@ TRANSLATIONS = {
         "interval_days": "天:",
         "interval_hours": "小时:",
         "interval_minutes": "分钟:",
+        # 后台任务状态
+        "busy": "正在与服务器通信…",
+        # 搜索与筛选
+        "search_placeholder": "搜索任务名称或详情",
+        "filter_all_status": "全部状态",
+        "filter_open": "未完成",
+        "filter_completed": "已完成",
+        "filter_all_priority": "全部优先级",
+        "filter_overdue": "已逾期",
     },
     "en": {
         "window_title": "Nextcloud Task Sync Client",
@@ -169,6 +178,15 @@ TRANSLATIONS = {
         "freq_custom": "Custom",
         "interval_days": "Days:",
         "interval_hours": "Hours:",
-        "interval_minutes": "Minutes:"
+        "interval_minutes": "Minutes:",
+        # Background job status
+        "busy": "Talking to server…",
+        # Search and filters
+        "search_placeholder": "Search names and details",
+        "filter_all_status": "All statuses",
+        "filter_open": "Open",
+        "filter_completed": "Completed",
+        "filter_all_priority": "All priorities",
+        "filter_overdue": "Overdue"
     }
 }